@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.core.database import get_db
 from backend.core.security import generate_api_key, hash_api_key
 from backend.models.api_key import APIKey
@@ -8,7 +8,7 @@ from backend.schemas.api_key import APIKeyCreate, APIKeyResponse
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 @router.post("/generate-api-key", response_model=APIKeyResponse, status_code=status.HTTP_201_CREATED)
-async def create_api_key(api_key_create: APIKeyCreate, db: Session = Depends(get_db)):
+async def create_api_key(api_key_create: APIKeyCreate, db: AsyncSession = Depends(get_db)):
     """Generates a new API key for internal/admin use."""
     raw_key = generate_api_key()
     hashed_key = hash_api_key(raw_key)
@@ -19,8 +19,8 @@ async def create_api_key(api_key_create: APIKeyCreate, db: Session = Depends(get
         is_active=api_key_create.is_active
     )
     db.add(db_api_key)
-    db.commit()
-    db.refresh(db_api_key)
+    await db.commit()
+    await db.refresh(db_api_key)
 
     # Return the raw key only once upon creation
     return APIKeyResponse(
@@ -1,17 +1,26 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session, joinedload
+import base64
+from collections import defaultdict
+from datetime import datetime
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse, RedirectResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from backend.core.database import get_db
 from backend.dependencies import get_api_key
 from backend.models.api_key import APIKey
 from backend.models.job import Job, JobStatus, SolverType
+from backend.models.performance_log import PerformanceLog
 from backend.schemas.job import JobCreate, JobResponse, JobStatusEnum
 import uuid
 from backend.tasks.geospatial_tasks import validate_and_preprocess_task # New: Import geospatial task
 from backend.tasks.quantum_tasks import quantum_solve_task
-from backend.core.object_storage import MinioClient
+from backend.core.object_storage import MinioClient, get_minio_client
+from backend.core.config import settings
+from backend.core.job_stream import publish_validate_job
 import os
 
 router = APIRouter(tags=["Job Management"])
@@ -20,7 +29,8 @@ logger = logging.getLogger(__name__)
 @router.post("/solve", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def create_job(
     job_create: JobCreate,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
     api_key: APIKey = Depends(get_api_key)
 ):
     """Submits a new flood simulation job and returns its ID."""
@@ -30,59 +40,128 @@ async def create_job(
         status=JobStatus.PENDING,
         solver_type=job_create.solver_type,
         parameters=job_create.parameters,
-        input_data_path=job_create.input_data_path
+        input_data_path=job_create.input_data_path,
+        performance_logs=[] # A new job has no logs; setting this avoids a lazy load when serializing
     )
     db.add(db_job)
-    db.commit()
-    db.refresh(db_job)
+    await db.commit() # Server-generated timestamps come back from the INSERT (Job uses eager_defaults)
 
-    # Dispatch the initial geospatial validation and pre-processing task
+    # Dispatch the initial geospatial validation and pre-processing task once the 202 has been sent.
     # This task will then chain to matrix generation and solver tasks.
-    validate_and_preprocess_task.delay(job_id, job_create.input_data_path, job_create.parameters, job_create.solver_type)
+    background_tasks.add_task(_dispatch_validate_job, job_id, job_create.input_data_path, job_create.parameters, job_create.solver_type)
 
     return db_job
 
+async def _dispatch_validate_job(job_id: str, input_data_path: Optional[str], parameters: Optional[dict], solver_type: SolverType):
+    try:
+        if settings.VALIDATE_DISPATCH_MODE == "stream":
+            await publish_validate_job(job_id, input_data_path, parameters, solver_type)
+        else:
+            # .delay is a blocking broker round trip; run it off the event loop
+            await run_in_threadpool(validate_and_preprocess_task.delay, job_id, input_data_path, parameters, solver_type)
+    except Exception as e:
+        logger.error(f"[{job_id}] Failed to dispatch validation task: {e}", exc_info=True)
+
+def _encode_cursor(created_at: datetime, job_id: str) -> str:
+    """Encodes the (created_at, id) position of a job as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(orjson.dumps([created_at.isoformat(), job_id])).decode("ascii")
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, job_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(job_id)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor.")
+
 @router.get("/jobs", response_model=List[JobResponse])
 async def get_all_jobs(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     api_key: APIKey = Depends(get_api_key),
-    skip: int = Query(0, ge=0, description="Number of items to skip (offset)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor/Link header"),
+    skip: int = Query(0, ge=0, description="Number of items to skip (offset); ignored when a cursor is given"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of items to return (page size)")
 ):
-    """Retrieves a list of all flood simulation jobs with pagination."""
-    # Eager load performance logs for JobResponse schema
-    jobs = db.query(Job).options(joinedload(Job.performance_logs)).offset(skip).limit(limit).all()
-    return jobs
+    """
+    Retrieves a list of all flood simulation jobs, newest first, with pagination.
+    Prefer `cursor` (keyset) pagination over `skip`: it seeks directly to the page via the (created_at, id) index.
+    """
+    # Rows are fetched as plain mappings and serialized once with orjson, bypassing ORM object
+    # construction and per-row JobResponse validation; the shape matches JobResponse.
+    if db.bind.dialect.name == "sqlite":
+        # SQLite keeps timestamps as text in mixed precision (whole seconds from server defaults, microseconds when
+        # bound), so rows are ordered and compared on one normalised form: the page order and the cursor then agree
+        def created_at_key(value):
+            return func.strftime("%Y-%m-%d %H:%M:%f", value)
+    else:
+        def created_at_key(value):
+            return value
+    query = select(*Job.__table__.columns).order_by(created_at_key(Job.created_at).desc(), Job.id.desc()).limit(limit + 1)
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(tuple_(created_at_key(Job.created_at), Job.id) < tuple_(created_at_key(cursor_created_at), cursor_id))
+    elif skip:
+        query = query.offset(skip)
+    job_rows = (await db.execute(query)).mappings().all()
+    has_next = len(job_rows) > limit
+    job_rows = job_rows[:limit]
+
+    # Performance logs for the whole page in one IN-query, grouped by job
+    logs_by_job = await _performance_logs_by_job(db, [row["id"] for row in job_rows])
+    jobs = [{**row, "performance_logs": logs_by_job.get(row["id"], [])} for row in job_rows]
+
+    headers = {}
+    if has_next:
+        next_cursor = _encode_cursor(job_rows[-1]["created_at"], job_rows[-1]["id"])
+        next_url = request.url.remove_query_params("skip").include_query_params(cursor=next_cursor, limit=limit)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return Response(content=orjson.dumps(jobs), media_type="application/json", headers=headers)
+
+async def _performance_logs_by_job(db: AsyncSession, job_ids: List[str]) -> dict[str, list[dict]]:
+    """Fetches the performance logs of several jobs as plain dicts in one IN-query, grouped by job and oldest first."""
+    logs_by_job = defaultdict(list)
+    if job_ids:
+        log_rows = (await db.execute(
+            select(*PerformanceLog.__table__.columns)
+            .where(PerformanceLog.job_id.in_(job_ids))
+            .order_by(PerformanceLog.timestamp)
+        )).mappings().all()
+        for log_row in log_rows:
+            logs_by_job[log_row["job_id"]].append(dict(log_row))
+    return logs_by_job
 
 @router.get("/jobs/{job_id}", response_model=JobResponse)
 async def get_job_details(
     job_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     api_key: APIKey = Depends(get_api_key)
 ):
     """Retrieves detailed status and information for a specific job."""
-    # Eager load performance logs for JobResponse schema
-    job = db.query(Job).options(joinedload(Job.performance_logs)).filter(Job.id == job_id).first()
-    if not job:
+    # Like the job list, the row and its performance logs are serialized straight from mappings with orjson,
+    # skipping ORM object construction and JobResponse/PerformanceLogResponse validation of every log entry.
+    job_row = (await db.execute(select(*Job.__table__.columns).where(Job.id == job_id))).mappings().one_or_none()
+    if not job_row:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
-    return job
+    logs_by_job = await _performance_logs_by_job(db, [job_id])
+    return Response(content=orjson.dumps({**job_row, "performance_logs": logs_by_job.get(job_id, [])}), media_type="application/json")
 
 @router.get("/results/{job_id}/{file_type}")
 async def get_job_results(
     job_id: str,
     file_type: str,
-    db: Session = Depends(get_db),
-    api_key: APIKey = Depends(get_api_key)
+    db: AsyncSession = Depends(get_db),
+    api_key: APIKey = Depends(get_api_key),
+    minio_client: MinioClient = Depends(get_minio_client)
 ):
     """Downloads the processed GIS results (GeoJSON or PDF) for a completed job."""
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
 
     if job.status not in [JobStatus.COMPLETED, JobStatus.FALLBACK_CLASSICAL_COMPLETED]:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job {job_id} is not yet completed. Current status: {job.status}")
 
-    minio_client = MinioClient()
     object_path = None
     media_type = None
     filename = None
@@ -102,12 +181,23 @@ async def get_job_results(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No {file_type} results found for job {job_id}.")
 
     try:
-        # Download the file content from MinIO
-        file_content = minio_client.download_file(object_path)
+        download_mode = settings.RESULT_DOWNLOAD_MODE.lower()
+        if download_mode == "presigned":
+            # Redirect the client to MinIO so the API worker never touches the bytes
+            url = minio_client.presigned_download_url(object_path, settings.RESULT_PRESIGNED_URL_TTL_SECONDS)
+            return RedirectResponse(url, status_code=status.HTTP_302_FOUND)
+        if download_mode == "xaccel":
+            # Hand the transfer off to nginx, which fetches the object from its internal MinIO location
+            return Response(status_code=status.HTTP_200_OK, media_type=media_type, headers={
+                "X-Accel-Redirect": f"{settings.RESULT_XACCEL_PREFIX.rstrip('/')}/{object_path}",
+                "Content-Disposition": f"attachment; filename={filename}"
+            })
 
-        # Return as a streaming response
-        return Response(content=file_content, media_type=media_type, headers={
-            "Content-Disposition": f"attachment; filename={filename}"
+        # Stream the object from MinIO in fixed-size chunks instead of buffering it in memory
+        stat = minio_client.stat_file(object_path)
+        return StreamingResponse(minio_client.stream_file(object_path), media_type=media_type, headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(stat.size)
         })
     except Exception as e:
         logger.error(f"[{job_id}] Failed to download {file_type} from object storage: {e}", exc_info=True)
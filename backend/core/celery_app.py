@@ -1,6 +1,18 @@
+import msgpack
+import msgpack_numpy
 from celery import Celery
+from kombu.serialization import register
 from backend.core.config import settings
 
+# msgpack with NumPy support: arrays are packed from their buffer rather than converted with tolist()
+register(
+    'msgpack',
+    lambda obj: msgpack.packb(obj, default=msgpack_numpy.encode, use_bin_type=True),
+    lambda data: msgpack.unpackb(data, object_hook=msgpack_numpy.decode, raw=False),
+    content_type='application/x-msgpack',
+    content_encoding='binary'
+)
+
 celery_app = Celery(
     "flood_forecasting",
     broker=settings.REDIS_URL,
@@ -9,9 +21,9 @@ celery_app = Celery(
 
 celery_app.conf.update(
     task_track_started=True,
-    task_serializer='json',
-    result_serializer='json',
-    accept_content=['json'],
+    task_serializer='msgpack',
+    result_serializer='msgpack',
+    accept_content=['msgpack', 'json'], # json is still accepted for messages queued before the switch
     timezone='UTC',
     enable_utc=True,
     # Autodiscover tasks in the 'backend.tasks' package
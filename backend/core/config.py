@@ -1,4 +1,6 @@
 import logging
+from functools import lru_cache
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
@@ -12,6 +14,9 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = "dev"
     POSTGRES_PASSWORD: str = "dev"
     DATABASE_URL: str = "sqlite:///./qflood.db"
+    DATABASE_POOL_SIZE: int = 20
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800
 
     # MinIO Configuration
     MINIO_ENDPOINT: str = "localhost:9000"
@@ -20,17 +25,34 @@ class Settings(BaseSettings):
     MINIO_BUCKET_NAME: str = "qflood-data"
     MINIO_SECURE: bool = False # Default to False for local dev, but will be enforced for production
 
+    # Result Download Configuration
+    RESULT_DOWNLOAD_MODE: str = "stream" # 'stream', 'presigned' (302 to MinIO) or 'xaccel' (nginx X-Accel-Redirect)
+    RESULT_PRESIGNED_URL_TTL_SECONDS: int = 300
+    RESULT_XACCEL_PREFIX: str = "/internal-minio/" # nginx internal location proxying to the MinIO bucket
+
     # API Key Hashing Salt
     API_KEY_HASH_SALT: str = "dev-salt-change-in-production"
+    # How long a verified API key is trusted without re-querying the DB, and so how long a key deactivated in the
+    # DB keeps working in each API process (0 disables the cache and makes revocation immediate)
+    API_KEY_CACHE_TTL_SECONDS: int = 60
 
     # Redis Configuration (for Celery)
     REDIS_URL: str = "redis://localhost:6379/0"
+    # How new jobs are handed to validation: 'celery' (the Celery queue) or 'stream' (Redis Stream XADD, read by
+    # backend.tasks.stream_consumer; only enable it once that consumer is deployed, or new jobs stay PENDING)
+    VALIDATE_DISPATCH_MODE: str = "celery"
+    VALIDATE_STREAM_NAME: str = "jobs:validate"
+    VALIDATE_STREAM_GROUP: str = "validators"
+    VALIDATE_STREAM_MAXLEN: int = 10000 # Approximate cap on retained stream entries
+    VALIDATE_STREAM_CLAIM_IDLE_SECONDS: int = 300 # Unacknowledged entries idle this long are redelivered; must exceed the longest validation
+    VALIDATE_STREAM_CLAIM_INTERVAL_SECONDS: int = 60 # How often each consumer looks for entries to reclaim
+    VALIDATE_STREAM_MAX_DELIVERIES: int = 5 # Deliveries after which the job is marked PREPROCESSING_FAILED
 
     # Application Environment
     APP_ENV: str = "development" # 'development', 'testing', 'production'
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    @model_validator(mode="after")
+    def enforce_secure_minio(self) -> "Settings":
         # Enforce MINIO_SECURE=True for non-development/testing environments
         if self.APP_ENV not in ["development", "testing"]:
             if not self.MINIO_SECURE:
@@ -44,6 +66,13 @@ class Settings(BaseSettings):
                 logger.info(f"MINIO_SECURE is True for APP_ENV={self.APP_ENV}, as required.")
         else:
             logger.info(f"MINIO_SECURE is {self.MINIO_SECURE} for APP_ENV={self.APP_ENV}.")
+        return self
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Returns the process-wide Settings, reading the environment and .env file only once."""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
@@ -1,48 +1,80 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from fastapi import HTTPException
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _engine_options(url, async_driver: bool) -> tuple[str, dict]:
+    """
+    Maps the configured DATABASE_URL onto the driver used by this process and returns it with engine options.
+    PostgreSQL uses psycopg 3 (sync for Celery workers, async for the API) with a sized, pre-pinged pool and
+    server-side prepared statements for hot queries; SQLite uses aiosqlite for the API.
+    """
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+        return url, {
+            "pool_size": settings.DATABASE_POOL_SIZE,
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "pool_recycle": settings.DATABASE_POOL_RECYCLE_SECONDS,
+            "pool_pre_ping": True,
+            "connect_args": {"prepare_threshold": 5},
+        }
+    if url.get_backend_name() == "sqlite" and async_driver:
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, {}
+
 try:
     from backend.core.config import settings
     SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    _sync_url, _sync_options = _engine_options(make_url(SQLALCHEMY_DATABASE_URL), async_driver=False)
+    _async_url, _async_options = _engine_options(make_url(SQLALCHEMY_DATABASE_URL), async_driver=True)
+    # Synchronous engine/sessions for Celery tasks and schema creation
+    engine = create_engine(_sync_url, **_sync_options)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # Asynchronous engine/sessions for API request handlers
+    async_engine = create_async_engine(_async_url, **_async_options)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
     DB_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Database configuration failed: {e}")
     # Create a dummy engine for development without database
     engine = None
     SessionLocal = None
+    async_engine = None
+    AsyncSessionLocal = None
     SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
     DB_AVAILABLE = False
 
 Base = declarative_base()
 
-def get_db():
-    """Dependency function that provides a database session."""
-    if not DB_AVAILABLE or SessionLocal is None:
+async def get_db():
+    """Dependency function that provides an async database session."""
+    if not DB_AVAILABLE or AsyncSessionLocal is None:
         raise HTTPException(status_code=503, detail="Database not available")
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+_db_initialized = False
 
 def init_db():
-    """Initializes the database by creating all tables defined in Base."""
+    """Initializes the database by creating all tables defined in Base. Runs at most once per process."""
+    global _db_initialized
+    if _db_initialized:
+        return
     if not DB_AVAILABLE or engine is None:
         logger.warning("Database not available, skipping table creation")
         return
-    
+
     try:
         # Import all models here to ensure they are registered with Base
         from backend.models.api_key import APIKey # noqa
         from backend.models.job import Job # noqa
         from backend.models.performance_log import PerformanceLog # New: Import PerformanceLog # noqa
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=engine, checkfirst=True)
+        _db_initialized = True
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
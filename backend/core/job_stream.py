@@ -0,0 +1,44 @@
+import logging
+import orjson
+import redis
+import redis.asyncio as aioredis
+from functools import lru_cache
+from backend.core.config import settings
+from backend.models.job import SolverType
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> aioredis.Redis:
+    """Returns the process-wide async Redis client used by the API to publish job dispatches."""
+    return aioredis.Redis.from_url(settings.REDIS_URL)
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    """Returns the process-wide Redis client used by stream consumers."""
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+async def publish_validate_job(job_id: str, input_data_path: str | None, parameters: dict | None, solver_type: SolverType) -> str:
+    """Appends a validate/pre-process request for a job to the validate stream (XADD) and returns the entry ID."""
+    entry_id = await get_async_redis().xadd(
+        settings.VALIDATE_STREAM_NAME,
+        {
+            "job_id": job_id,
+            "input_path": input_data_path or "",
+            "params": orjson.dumps(parameters),
+            "solver": solver_type.value,
+        },
+        maxlen=settings.VALIDATE_STREAM_MAXLEN,
+        approximate=True
+    )
+    logger.info(f"[{job_id}] Published to stream '{settings.VALIDATE_STREAM_NAME}' as {entry_id!r}.")
+    return entry_id
+
+def decode_validate_job(fields: dict) -> tuple[str, str | None, dict | None, SolverType]:
+    """Decodes a validate stream entry back into validate_and_preprocess_task arguments."""
+    return (
+        fields[b"job_id"].decode(),
+        fields[b"input_path"].decode() or None,
+        orjson.loads(fields[b"params"]),
+        SolverType(fields[b"solver"].decode()),
+    )
@@ -0,0 +1,95 @@
+import io
+import numpy as np
+from numpy.lib import format as npy_format
+
+def load_npy(data: bytes | bytearray | memoryview) -> np.ndarray:
+    """
+    Loads an array from the bytes of an .npy file without copying the array data.
+    Only the header is parsed; the result is a view over `data` (read-only for bytes).
+    Fortran-ordered and object arrays (and other format versions) fall back to np.load.
+    """
+    view = memoryview(data)
+    version = npy_format.read_magic(io.BytesIO(view[:npy_format.MAGIC_LEN]))
+    length_size = 2 if version == (1, 0) else 4
+    header_end = npy_format.MAGIC_LEN + length_size + int.from_bytes(view[npy_format.MAGIC_LEN:npy_format.MAGIC_LEN + length_size], "little")
+    header = io.BytesIO(view[:header_end]) # Only the header bytes are copied
+    version = npy_format.read_magic(header)
+    if version == (1, 0):
+        shape, fortran_order, dtype = npy_format.read_array_header_1_0(header)
+    elif version == (2, 0):
+        shape, fortran_order, dtype = npy_format.read_array_header_2_0(header)
+    else:
+        return np.load(io.BytesIO(data), allow_pickle=False)
+    if fortran_order or dtype.hasobject:
+        return np.load(io.BytesIO(data), allow_pickle=False)
+    return np.frombuffer(data, dtype=dtype, count=int(np.prod(shape)), offset=header.tell()).reshape(shape)
+
+class NpyStream(io.RawIOBase):
+    """
+    Readable .npy serialization of an array that streams the header and then the array's own memory,
+    so uploading an array does not first copy it into a BytesIO.
+    """
+
+    def __init__(self, array: np.ndarray):
+        super().__init__()
+        array = np.asarray(array, order="C")
+        header = io.BytesIO()
+        npy_format.write_array_header_1_0(header, npy_format.header_data_from_array_1_0(array))
+        # Flattened first: memoryview cannot cast multi-dimensional views with a zero-length axis, such as (0, 3)
+        self._parts = [memoryview(header.getvalue()), memoryview(array.reshape(-1)).cast("B")]
+        self.size = sum(part.nbytes for part in self._parts)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        target = memoryview(buffer).cast("B")
+        written = 0
+        offset = self._position
+        for part in self._parts:
+            if offset >= part.nbytes:
+                offset -= part.nbytes
+                continue
+            chunk = part[offset:offset + target.nbytes - written]
+            target[written:written + chunk.nbytes] = chunk
+            written += chunk.nbytes
+            offset = 0
+            if written == target.nbytes:
+                break
+        self._position += written
+        return written
+
+class BufferReader(io.RawIOBase):
+    """
+    Seekable read-only file over an existing buffer, for readers that need a file (e.g. scipy's load_npz, which opens
+    a zip archive). Unlike io.BytesIO(memoryview), the buffer is not copied.
+    """
+
+    def __init__(self, data: bytes | bytearray | memoryview):
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._view.nbytes}[whence]
+        if base + offset < 0:
+            raise ValueError(f"Negative seek position {base + offset}")
+        self._position = base + offset
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        target = memoryview(buffer).cast("B")
+        chunk = self._view[self._position:self._position + target.nbytes]
+        target[:chunk.nbytes] = chunk
+        self._position += chunk.nbytes
+        return chunk.nbytes
@@ -1,26 +1,60 @@
 import logging
+import certifi
+import urllib3
+import zstandard
 from minio import Minio
 from minio.error import S3Error
 from backend.core.config import settings
 import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+from typing import Iterator
 
 logger = logging.getLogger(__name__)
 
+# Objects uploaded with compress="zstd" carry these user metadata entries (x-amz-meta-*);
+# downloads use them to decompress transparently into a buffer of the original size.
+ENCODING_METADATA = "encoding"
+UNCOMPRESSED_SIZE_METADATA = "uncompressed-size"
+STREAM_PART_SIZE = 10 * 1024 * 1024 # Compressed and unknown-length uploads have no size up front, so they are sent as 10 MiB multipart parts
+
+def _is_zstd(response) -> bool:
+    return response.headers.get(f"x-amz-meta-{ENCODING_METADATA}") == "zstd"
+
 class MinioClient:
+    _bucket_checked = False # The bucket only needs to be checked/created once per process
+
     def __init__(self):
         self.client = Minio(
             settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE
+            secure=settings.MINIO_SECURE,
+            http_client=self._build_http_client()
         )
         self._ensure_bucket_exists()
 
+    @staticmethod
+    def _build_http_client() -> urllib3.PoolManager:
+        """Connection pool shared by all requests of this client (same timeouts/retries as the MinIO default, larger pool)."""
+        return urllib3.PoolManager(
+            num_pools=10,
+            maxsize=50,
+            timeout=urllib3.Timeout(connect=300, read=300),
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=certifi.where(),
+            retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+        )
+
     def _ensure_bucket_exists(self):
+        if MinioClient._bucket_checked:
+            return
         try:
             if not self.client.bucket_exists(settings.MINIO_BUCKET_NAME):
                 self.client.make_bucket(settings.MINIO_BUCKET_NAME)
                 logger.info(f"Bucket '{settings.MINIO_BUCKET_NAME}' created successfully.") # CQ-005: Use logging
+            MinioClient._bucket_checked = True
         except S3Error as e: # CQ-005: Specific exception
             logger.error(f"Error checking/creating bucket: {e}", exc_info=True) # CQ-005: Use logging
             raise
@@ -28,16 +62,37 @@ class MinioClient:
             logger.error(f"An unexpected error occurred during bucket check/creation: {e}", exc_info=True)
             raise
 
-    def upload_file(self, object_name: str, file_stream: io.IOBase, file_size: int, content_type: str):
-        """Uploads a file stream to the configured MinIO bucket."""
+    def upload_file(self, object_name: str, file_stream: io.IOBase, file_size: int | None, content_type: str, compress: str | None = None):
+        """
+        Uploads a file stream to the configured MinIO bucket.
+        A file_size of None streams an unknown-length upload as a multipart upload.
+        With compress="zstd" the stream is zstd-compressed on the fly (level 3) and tagged in the object's metadata,
+        so the download methods decompress it transparently.
+        """
         try:
-            self.client.put_object(
-                settings.MINIO_BUCKET_NAME,
-                object_name,
-                file_stream, # SEC-003: Pass the stream directly
-                file_size,   # SEC-003: Pass the size
-                content_type=content_type
-            )
+            if compress == "zstd":
+                if file_size is None:
+                    raise ValueError("Compressed uploads need the uncompressed file size.")
+                self.client.put_object(
+                    settings.MINIO_BUCKET_NAME,
+                    object_name,
+                    zstandard.ZstdCompressor(level=3).stream_reader(file_stream, size=file_size),
+                    -1,
+                    content_type=content_type,
+                    metadata={ENCODING_METADATA: "zstd", UNCOMPRESSED_SIZE_METADATA: str(file_size)},
+                    part_size=STREAM_PART_SIZE
+                )
+            elif compress is None:
+                self.client.put_object(
+                    settings.MINIO_BUCKET_NAME,
+                    object_name,
+                    file_stream, # SEC-003: Pass the stream directly
+                    file_size if file_size is not None else -1, # SEC-003: Pass the size when it is known
+                    content_type=content_type,
+                    part_size=STREAM_PART_SIZE
+                )
+            else:
+                raise ValueError(f"Unsupported compression '{compress}'.")
             logger.info(f"'{object_name}' is successfully uploaded to bucket '{settings.MINIO_BUCKET_NAME}'.") # CQ-005: Use logging
         except S3Error as e: # CQ-005: Specific exception
             logger.error(f"Error uploading file '{object_name}': {e}", exc_info=True) # CQ-005: Use logging
@@ -50,6 +105,8 @@ class MinioClient:
         """Downloads a file from the configured MinIO bucket."""
         try:
             response = self.client.get_object(settings.MINIO_BUCKET_NAME, object_name)
+            if _is_zstd(response):
+                return bytes(self._read_zstd_into_buffer(response, object_name))
             return response.read()
         except S3Error as e: # CQ-005: Specific exception
             logger.error(f"Error downloading file '{object_name}': {e}", exc_info=True) # CQ-005: Use logging
@@ -61,3 +118,117 @@ class MinioClient:
             if 'response' in locals() and response:
                 response.close()
                 response.release_conn()
+
+    def download_buffer(self, object_name: str) -> memoryview:
+        """
+        Downloads a file from the configured MinIO bucket into a buffer preallocated from its Content-Length.
+        The body is read straight into the buffer, avoiding the chunk concatenation of `download_file`;
+        zstd-compressed objects are decompressed straight into a buffer of their original size.
+        """
+        try:
+            response = self.client.get_object(settings.MINIO_BUCKET_NAME, object_name)
+            if _is_zstd(response):
+                return self._read_zstd_into_buffer(response, object_name)
+            return self._read_into_buffer(response, int(response.headers["Content-Length"]), object_name)
+        except S3Error as e:
+            logger.error(f"Error downloading file '{object_name}': {e}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"An unexpected error occurred during file download '{object_name}': {e}", exc_info=True)
+            raise
+        finally:
+            if 'response' in locals() and response:
+                response.close()
+                response.release_conn()
+
+    @staticmethod
+    def _read_into_buffer(reader, size: int, object_name: str) -> memoryview:
+        buffer = memoryview(bytearray(size))
+        offset = 0
+        while offset < size:
+            read = reader.readinto(buffer[offset:])
+            if not read:
+                raise IOError(f"Download of '{object_name}' ended after {offset} of {size} bytes.")
+            offset += read
+        return buffer
+
+    def _read_zstd_into_buffer(self, response, object_name: str) -> memoryview:
+        size = int(response.headers[f"x-amz-meta-{UNCOMPRESSED_SIZE_METADATA}"])
+        with zstandard.ZstdDecompressor().stream_reader(response, closefd=False) as reader:
+            return self._read_into_buffer(reader, size, object_name)
+
+    def download_buffers(self, *object_names: str) -> list[memoryview]:
+        """Downloads several files concurrently with `download_buffer`, returning them in the order requested."""
+        with ThreadPoolExecutor(max_workers=len(object_names)) as pool:
+            return list(pool.map(self.download_buffer, object_names))
+
+    def download_partial(self, object_name: str, offset: int, length: int) -> bytes:
+        """Downloads a byte range of a file from the configured MinIO bucket."""
+        try:
+            response = self.client.get_object(settings.MINIO_BUCKET_NAME, object_name, offset=offset, length=length)
+            return response.read()
+        except S3Error as e:
+            logger.error(f"Error downloading range of file '{object_name}': {e}", exc_info=True)
+            raise
+        finally:
+            if 'response' in locals() and response:
+                response.close()
+                response.release_conn()
+
+    def file_exists(self, object_name: str) -> bool:
+        """Checks whether an object exists in the configured MinIO bucket (a HEAD request; nothing is downloaded)."""
+        try:
+            self.client.stat_object(settings.MINIO_BUCKET_NAME, object_name)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return False
+            logger.error(f"Error checking for '{object_name}': {e}", exc_info=True)
+            raise
+
+    def stat_file(self, object_name: str):
+        """Returns the object metadata (size, etag, content type) without downloading it."""
+        try:
+            return self.client.stat_object(settings.MINIO_BUCKET_NAME, object_name)
+        except S3Error as e:
+            logger.error(f"Error reading metadata for '{object_name}': {e}", exc_info=True)
+            raise
+
+    def stream_file(self, object_name: str, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+        """
+        Streams a file from the configured MinIO bucket in chunks of `chunk_size` bytes.
+        The request is issued eagerly so lookup errors surface before the first chunk is consumed;
+        the connection is released once the returned iterator is exhausted or closed.
+        """
+        try:
+            response = self.client.get_object(settings.MINIO_BUCKET_NAME, object_name)
+        except S3Error as e:
+            logger.error(f"Error opening stream for '{object_name}': {e}", exc_info=True)
+            raise
+
+        def _iter_chunks() -> Iterator[bytes]:
+            try:
+                yield from response.stream(chunk_size)
+            finally:
+                response.close()
+                response.release_conn()
+
+        return _iter_chunks()
+
+    def presigned_download_url(self, object_name: str, expires_seconds: int) -> str:
+        """Returns a time-limited URL that lets clients download the object directly from MinIO."""
+        try:
+            return self.client.presigned_get_object(
+                settings.MINIO_BUCKET_NAME,
+                object_name,
+                expires=timedelta(seconds=expires_seconds)
+            )
+        except S3Error as e:
+            logger.error(f"Error generating presigned URL for '{object_name}': {e}", exc_info=True)
+            raise
+
+
+@lru_cache(maxsize=1)
+def get_minio_client() -> MinioClient:
+    """Returns the process-wide MinioClient so its connection pool is reused across requests."""
+    return MinioClient()
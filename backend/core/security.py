@@ -1,13 +1,21 @@
 import secrets
 import hashlib
+import hmac
+from backend.core.config import settings
 
 def hash_api_key(api_key: str) -> str:
-    """Hashes an API key using SHA-256."""
-    return hashlib.sha256(api_key.encode()).hexdigest()
+    """
+    Hashes an API key using HMAC-SHA256 keyed with API_KEY_HASH_SALT.
+    Keys come from secrets.token_urlsafe, so a deterministic keyed hash is sufficient and
+    allows looking keys up by their hash instead of verifying every stored key.
+    Not memoized, so plaintext keys are not kept in memory; the API key cache in dependencies is keyed
+    by this hash instead. hmac.digest is the one-shot form, computed without building an HMAC object.
+    """
+    return hmac.digest(settings.API_KEY_HASH_SALT.encode(), api_key.encode(), hashlib.sha256).hex()
 
 def verify_api_key(plain_api_key: str, hashed_api_key: str) -> bool:
-    """Verifies a plain API key against its hashed version."""
-    return hash_api_key(plain_api_key) == hashed_api_key
+    """Verifies a plain API key against its hashed version in constant time."""
+    return hmac.compare_digest(hash_api_key(plain_api_key), hashed_api_key)
 
 def generate_api_key(length: int = 32) -> str:
     """Generates a cryptographically secure random API key."""
@@ -1,9 +1,14 @@
+import hmac
 import logging
+import time
+from collections import OrderedDict
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import APIKeyHeader
-from sqlalchemy.orm import Session
-from backend.core.database import SessionLocal
-from backend.core.security import verify_api_key
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.config import settings
+from backend.core.database import get_db
+from backend.core.security import hash_api_key
 from backend.models.api_key import APIKey
 
 logger = logging.getLogger(__name__)
@@ -11,28 +16,48 @@ logger = logging.getLogger(__name__)
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=True)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Process-local cache of recently verified keys: hashed_key -> (expires_at, APIKey), least recently used first.
+# There is no cross-process invalidation: a key deactivated in the DB stays usable in each API worker process
+# until its entry expires, i.e. for up to API_KEY_CACHE_TTL_SECONDS (set it to 0 for immediate revocation).
+_API_KEY_CACHE_MAX_SIZE = 4096
+_api_key_cache: "OrderedDict[str, tuple[float, APIKey]]" = OrderedDict()
 
-async def get_api_key(api_key: str = Security(api_key_header), db: Session = Depends(get_db)):
+def _get_cached_api_key(hashed_key: str) -> APIKey | None:
+    entry = _api_key_cache.get(hashed_key)
+    if entry is None:
+        return None
+    expires_at, key_obj = entry
+    if expires_at < time.monotonic():
+        _api_key_cache.pop(hashed_key, None)
+        return None
+    _api_key_cache.move_to_end(hashed_key)
+    return key_obj
+
+def _cache_api_key(hashed_key: str, key_obj: APIKey):
+    if settings.API_KEY_CACHE_TTL_SECONDS <= 0:
+        return
+    _api_key_cache[hashed_key] = (time.monotonic() + settings.API_KEY_CACHE_TTL_SECONDS, key_obj)
+    _api_key_cache.move_to_end(hashed_key)
+    while len(_api_key_cache) > _API_KEY_CACHE_MAX_SIZE:
+        _api_key_cache.popitem(last=False)
+
+async def get_api_key(api_key: str = Security(api_key_header), db: AsyncSession = Depends(get_db)):
     """Dependency to validate API key from request header."""
-    # CQ-004: Updated comment regarding scalability for bcrypt-based API key verification.
-    # Due to bcrypt's non-deterministic nature, direct database lookup by hashed_key is not possible.
-    # This approach iterates through active API keys and verifies them.
-    # For very large numbers of API keys, a more scalable authentication mechanism
-    # or a system involving a non-secret key identifier for initial lookup might be considered
-    # in future iterations.
-    stored_api_keys = db.query(APIKey).filter(APIKey.is_active == True).all()
-    
-    for key_obj in stored_api_keys:
-        if verify_api_key(api_key, key_obj.hashed_key):
-            logger.info(f"API Key '{key_obj.id}' successfully authenticated.")
-            return key_obj
-    
+    # API keys are hashed deterministically, so the key can be found with a single
+    # lookup on the unique hashed_key index instead of verifying every stored key.
+    hashed_key = hash_api_key(api_key)
+    key_obj = _get_cached_api_key(hashed_key)
+    if key_obj:
+        return key_obj
+
+    result = await db.execute(select(APIKey).where(APIKey.hashed_key == hashed_key, APIKey.is_active == True))
+    key_obj = result.scalar_one_or_none()
+    # Re-check the stored hash in constant time rather than relying solely on the database's string equality
+    if key_obj and hmac.compare_digest(key_obj.hashed_key, hashed_key):
+        logger.info(f"API Key '{key_obj.id}' successfully authenticated.")
+        _cache_api_key(hashed_key, key_obj)
+        return key_obj
+
     logger.warning("Authentication failed: Invalid or inactive API Key provided.")
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
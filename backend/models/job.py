@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship, Mapped
 from typing import List
@@ -45,5 +45,13 @@ class Job(Base):
 
     performance_logs: Mapped[List["PerformanceLog"]] = relationship("PerformanceLog", back_populates="job", cascade="all, delete-orphan")
 
+    # Fetch server-generated columns (created_at/updated_at) via RETURNING on flush instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Supports newest-first keyset pagination on (created_at, id)
+        Index("ix_jobs_created_id", created_at.desc(), id.desc()),
+    )
+
     def __repr__(self):
         return f"<Job(id='{self.id}', status='{self.status}', solver_type='{self.solver_type}')>"
@@ -8,7 +8,7 @@ class PerformanceLog(Base):
     __tablename__ = "performance_logs"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False, index=True)
     step_name = Column(String, nullable=False) # e.g., 'classical_solve', 'quantum_solve'
     execution_time_seconds = Column(Float, nullable=False)
     peak_memory_mb = Column(Float, nullable=True)
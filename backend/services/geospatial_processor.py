@@ -1,9 +1,11 @@
 import logging
 import io
 import json
-from jsonschema import validate, ValidationError
-from datetime import datetime
+from contextlib import contextmanager
+import fastjsonschema
+from datetime import datetime, timezone
 import numpy as np
+from backend.core.config import settings
 
 # Optional geospatial dependencies (not required for basic API functionality)
 try:
@@ -18,16 +20,163 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("Geospatial libraries not available. File upload features will be limited.")
 
+# Optional GDAL metadata reader for vector data; fiona is used without it
+try:
+    import pyogrio
+    PYOGRIO_AVAILABLE = True
+except ImportError:
+    PYOGRIO_AVAILABLE = False
+
+# Optional fast JSON parser/serializer (reads bytes directly, emits bytes); stdlib json is used without it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional JIT compiler for the raster reduction kernel; a NumPy implementation is used without it
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+if NUMBA_AVAILABLE:
+    # fastmath is limited to reassociation/contraction: the 'nnan' flag would fold the v == v NaN test away
+    @njit(parallel=True, fastmath={"reassoc", "contract"}, cache=True)
+    def _nansum_count(values, invalid):
+        """Sums and counts the non-NaN, unmasked elements of a flat array in a single pass."""
+        total = 0.0
+        count = 0
+        for i in prange(values.size):
+            v = values[i]
+            if not invalid[i] and v == v:
+                total += v
+                count += 1
+        return total, count
+else:
+    def _nansum_count(values, invalid):
+        """Sums and counts the non-NaN, unmasked elements of a flat array."""
+        valid = ~invalid
+        if np.issubdtype(values.dtype, np.floating):
+            valid &= ~np.isnan(values)
+        return float(values[valid].sum(dtype=np.float64)), int(valid.sum())
+
+def _json_loads(content: bytes):
+    """Parses JSON from raw bytes without an intermediate str decode when orjson is available."""
+    return orjson.loads(content) if ORJSON_AVAILABLE else json.loads(content)
+
+def _json_default(obj):
+    """Converts NumPy scalars and arrays for the stdlib json fallback."""
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _json_dumps_pretty(data: dict) -> bytes:
+    """Serializes to indented UTF-8 JSON bytes; NumPy scalars and arrays are serialized natively."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, indent=2, default=_json_default).encode('utf-8')
+
+# Schema for JSON config uploads, compiled once into a Python validator function
+_CONFIG_VALIDATOR = fastjsonschema.compile({
+    "type": "object",
+    "properties": {
+        "grid_resolution": {"type": "integer", "minimum": 1},
+        "conversion_factor": {"type": "number", "minimum": 0},
+        "base_elevation": {"type": "number"},
+        "water_level_offset": {"type": "number"},
+        "flood_threshold": {"type": "number", "minimum": 0}
+    },
+    "additionalProperties": True # Allow other parameters
+})
+
+# File types GDAL can read straight from object storage, so their bytes never need to be downloaded
+VSI_FILE_TYPES = ("image/tiff", "application/geotiff", "application/zip")
+
+def _gdal_vsi_options() -> dict:
+    """GDAL configuration for reading objects from the MinIO bucket through /vsis3/."""
+    return {
+        "AWS_S3_ENDPOINT": settings.MINIO_ENDPOINT,
+        "AWS_ACCESS_KEY_ID": settings.MINIO_ACCESS_KEY,
+        "AWS_SECRET_ACCESS_KEY": settings.MINIO_SECRET_KEY,
+        "AWS_HTTPS": "YES" if settings.MINIO_SECURE else "NO",
+        "AWS_VIRTUAL_HOSTING": "FALSE",
+        "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    }
+
+@contextmanager
+def _pyogrio_config(options: dict):
+    """
+    Applies GDAL config options to pyogrio for the duration of the block, then restores the previous values.
+    pyogrio only has process-wide config options (and bundles its own GDAL, which rasterio.Env does not reach),
+    so the MinIO endpoint and credentials must not be left set for later GDAL operations in the worker.
+    """
+    previous = {name: pyogrio.get_gdal_config_option(name) for name in options}
+    pyogrio.set_gdal_config_options(options)
+    try:
+        yield
+    finally:
+        pyogrio.set_gdal_config_options(previous) # None unsets an option that was not set before
+
 class GeospatialProcessorService:
     def __init__(self):
         if not GEOSPATIAL_AVAILABLE:
             logger.warning("GeospatialProcessorService initialized without geospatial libraries")
 
-    def validate_geospatial_data(self, file_content: bytes, file_type: str, job_id: str) -> bool:
+    @contextmanager
+    def _open_raster(self, file_content: bytes | None, object_path: str | None):
+        """Opens a raster from object storage via GDAL's /vsis3/ handler, or from in-memory bytes."""
+        if object_path:
+            with rasterio.Env(**_gdal_vsi_options()), rasterio.open(f"/vsis3/{settings.MINIO_BUCKET_NAME}/{object_path}") as src:
+                yield src
+        else:
+            with rasterio.open(io.BytesIO(file_content)) as src:
+                yield src
+
+    @contextmanager
+    def _open_vector(self, file_content: bytes | None, object_path: str | None):
+        """Opens a zipped vector dataset from object storage via /vsizip//vsis3/, or from in-memory bytes."""
+        if object_path:
+            with fiona.Env(**_gdal_vsi_options()), fiona.open(f"/vsizip//vsis3/{settings.MINIO_BUCKET_NAME}/{object_path}") as src:
+                yield src
+        else:
+            with fiona.open(io.BytesIO(file_content)) as src:
+                yield src
+
+    def _read_vector_info(self, file_content: bytes | None, object_path: str | None) -> dict:
+        """
+        Returns driver, CRS, feature count and bounds of a zipped vector dataset.
+        With pyogrio these come from a single GDAL layer metadata call (the shapefile header),
+        so no features are iterated; otherwise they are read through fiona.
+        """
+        if PYOGRIO_AVAILABLE:
+            if object_path:
+                with _pyogrio_config(_gdal_vsi_options()):
+                    info = pyogrio.read_info(f"/vsizip//vsis3/{settings.MINIO_BUCKET_NAME}/{object_path}", force_feature_count=True, force_total_bounds=True)
+            else:
+                info = pyogrio.read_info(file_content, force_feature_count=True, force_total_bounds=True)
+            return {
+                "driver": info["driver"],
+                "crs": info["crs"],
+                "feature_count": int(info["features"]),
+                "bounds": tuple(info["total_bounds"]),
+            }
+        with self._open_vector(file_content, object_path) as src:
+            return {
+                "driver": src.driver,
+                "crs": src.crs.to_wkt() if src.crs else None,
+                "feature_count": len(src),
+                "bounds": src.bounds,
+            }
+
+    def validate_geospatial_data(self, file_content: bytes | None, file_type: str, job_id: str, object_path: str | None = None) -> bool:
         """
         Performs comprehensive validation of geospatial data based on its inferred MIME type.
+        Raster and zipped vector data are read directly from `object_path` in object storage when it is given,
+        in which case `file_content` may be None.
         """
         if not GEOSPATIAL_AVAILABLE:
             logger.error(f"[{job_id}] Geospatial libraries not available. Cannot validate {file_type}")
@@ -37,7 +186,7 @@ class GeospatialProcessorService:
 
         if file_type in ("image/tiff", "application/geotiff"): # GeoTIFF
             try:
-                with rasterio.open(io.BytesIO(file_content)) as src:
+                with self._open_raster(file_content, object_path) as src:
                     if not src.crs:
                         logger.warning(f"[{job_id}] GeoTIFF validation warning: No CRS found.")
                     if src.count == 0:
@@ -53,15 +202,15 @@ class GeospatialProcessorService:
                 return False
         elif file_type == "application/zip": # Common for Shapefiles
             try:
-                # Fiona can open zip files directly if they contain a shapefile
-                with fiona.open(io.BytesIO(file_content)) as src:
-                    if not src.driver:
-                        logger.error(f"[{job_id}] Shapefile validation failed: Could not determine driver.")
-                        return False
-                    if len(src) == 0:
-                        logger.warning(f"[{job_id}] Shapefile validation warning: No features found.")
-                    logger.info(f"[{job_id}] Shapefile validation successful. Driver: {src.driver}, CRS: {src.crs}")
-                    return True
+                # GDAL can open zip files directly if they contain a shapefile
+                info = self._read_vector_info(file_content, object_path)
+                if not info["driver"]:
+                    logger.error(f"[{job_id}] Shapefile validation failed: Could not determine driver.")
+                    return False
+                if info["feature_count"] == 0:
+                    logger.warning(f"[{job_id}] Shapefile validation warning: No features found.")
+                logger.info(f"[{job_id}] Shapefile validation successful. Driver: {info['driver']}, CRS: {info['crs']}")
+                return True
             except fiona.errors.DriverError as e:
                 logger.error(f"[{job_id}] Shapefile validation failed due to Fiona DriverError: {e}", exc_info=True)
                 return False
@@ -70,26 +219,14 @@ class GeospatialProcessorService:
                 return False
         elif file_type == "application/json":
             try:
-                data = json.loads(file_content.decode('utf-8'))
-                # Define a simple schema for expected config parameters
-                config_schema = {
-                    "type": "object",
-                    "properties": {
-                        "grid_resolution": {"type": "integer", "minimum": 1},
-                        "conversion_factor": {"type": "number", "minimum": 0},
-                        "base_elevation": {"type": "number"},
-                        "water_level_offset": {"type": "number"},
-                        "flood_threshold": {"type": "number", "minimum": 0}
-                    },
-                    "additionalProperties": True # Allow other parameters
-                }
-                validate(instance=data, schema=config_schema)
+                data = _json_loads(file_content)
+                _CONFIG_VALIDATOR(data)
                 logger.info(f"[{job_id}] JSON config file validation successful.")
                 return True
             except json.JSONDecodeError as e:
                 logger.error(f"[{job_id}] JSON config file validation failed: Invalid JSON format: {e}", exc_info=True)
                 return False
-            except ValidationError as e:
+            except fastjsonschema.JsonSchemaException as e:
                 logger.error(f"[{job_id}] JSON config file validation failed: Schema mismatch: {e.message}", exc_info=True)
                 return False
             except Exception as e:
@@ -112,21 +249,22 @@ class GeospatialProcessorService:
             logger.warning(f"[{job_id}] Validation failed: Unsupported file type '{file_type}'.")
             return False
 
-    def preprocess_geospatial_data(self, file_content: bytes, file_type: str, job_id: str, parameters: dict) -> tuple[bytes, str]:
+    def preprocess_geospatial_data(self, file_content: bytes | None, file_type: str, job_id: str, parameters: dict, object_path: str | None = None) -> tuple[bytes, str]:
         """
         Pre-processes geospatial data to extract relevant features and convert to a standardized JSON format.
+        As with validation, raster and zipped vector data are read from `object_path` when it is given.
         """
         logger.info(f"[{job_id}] Starting pre-processing for file type: {file_type}")
         preprocessed_metadata = {
             "job_id": job_id,
             "original_file_type": file_type,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "extracted_parameters": {}
         }
 
         if file_type in ("image/tiff", "application/geotiff"):
             try:
-                with rasterio.open(io.BytesIO(file_content)) as src:
+                with self._open_raster(file_content, object_path) as src:
                     preprocessed_metadata["extracted_parameters"] = {
                         "bounds": src.bounds._asdict(),
                         "width": src.width,
@@ -136,10 +274,19 @@ class GeospatialProcessorService:
                         "nodata": src.nodata,
                         "count": src.count
                     }
-                    if src.count > 0:
-                        band1 = src.read(1)
-                        if np.issubdtype(band1.dtype, np.number):
-                            preprocessed_metadata["extracted_parameters"]["mean_value_band1"] = float(np.nanmean(band1)) # Use nanmean to handle nodata
+                    if src.count > 0 and np.issubdtype(np.dtype(src.dtypes[0]), np.number):
+                        # Accumulate the band mean block by block so the full raster is never held in memory.
+                        # masked=True masks nodata pixels; NaNs are excluded as well.
+                        total, count = 0.0, 0
+                        for _, window in src.block_windows(1):
+                            block = src.read(1, window=window, masked=True)
+                            block_total, block_count = _nansum_count(
+                                np.ascontiguousarray(np.ma.getdata(block)).ravel(),
+                                np.ma.getmaskarray(block).ravel()
+                            )
+                            total += block_total
+                            count += block_count
+                        preprocessed_metadata["extracted_parameters"]["mean_value_band1"] = total / count if count else np.nan
 
                     if 'grid_resolution' not in parameters and src.width > 0 and src.height > 0:
                         # Example heuristic: use the smaller dimension divided by a factor
@@ -155,7 +302,7 @@ class GeospatialProcessorService:
 
         elif file_type == "application/json":
             try:
-                data = json.loads(file_content.decode('utf-8'))
+                data = _json_loads(file_content)
                 preprocessed_metadata["extracted_parameters"].update(data)
                 logger.info(f"[{job_id}] Parsed JSON config file. Extracted parameters: {data}")
             except json.JSONDecodeError as e:
@@ -176,18 +323,15 @@ class GeospatialProcessorService:
         elif file_type == "application/zip": # Shapefile
             # For shapefiles, pre-processing might involve extracting bounding box, feature count, etc.
             try:
-                # Using geopandas to read the shapefile from bytes
-                # geopandas.read_file can take a path to a zip or a file-like object
-                # For in-memory zip, we need to use a virtual file system or save to temp
-                # A simpler approach for metadata extraction without full file system interaction:
-                with fiona.open(io.BytesIO(file_content)) as src:
-                    bounds = src.bounds # (minx, miny, maxx, maxy)
-                    preprocessed_metadata["extracted_parameters"]["bounds"] = {
-                        "left": bounds[0], "bottom": bounds[1], "right": bounds[2], "top": bounds[3]
-                    }
-                    preprocessed_metadata["extracted_parameters"]["feature_count"] = len(src)
-                    preprocessed_metadata["extracted_parameters"]["crs"] = src.crs.to_wkt() if src.crs else None
-                    logger.info(f"[{job_id}] Shapefile pre-processing successful. Extracted metadata: {preprocessed_metadata['extracted_parameters']}")
+                # Metadata only: bounds, feature count and CRS come from the layer header, features are not read
+                info = self._read_vector_info(file_content, object_path)
+                bounds = info["bounds"] # (minx, miny, maxx, maxy)
+                preprocessed_metadata["extracted_parameters"]["bounds"] = {
+                    "left": bounds[0], "bottom": bounds[1], "right": bounds[2], "top": bounds[3]
+                }
+                preprocessed_metadata["extracted_parameters"]["feature_count"] = info["feature_count"]
+                preprocessed_metadata["extracted_parameters"]["crs"] = info["crs"]
+                logger.info(f"[{job_id}] Shapefile pre-processing successful. Extracted metadata: {preprocessed_metadata['extracted_parameters']}")
             except Exception as e:
                 logger.error(f"[{job_id}] Shapefile pre-processing failed: {e}", exc_info=True)
 
@@ -195,7 +339,6 @@ class GeospatialProcessorService:
             logger.warning(f"[{job_id}] No specific pre-processing implemented for file type '{file_type}'. Returning generic metadata.")
 
         # Merge job parameters into extracted parameters, prioritizing extracted
-        merged_parameters = {**parameters, **preprocessed_metadata["extracted_parameters"]}
-        preprocessed_metadata["extracted_parameters"] = merged_parameters
+        preprocessed_metadata["extracted_parameters"] = {**parameters, **preprocessed_metadata["extracted_parameters"]}
 
-        return json.dumps(preprocessed_metadata, indent=2).encode('utf-8'), "application/json"
+        return _json_dumps_pretty(preprocessed_metadata), "application/json"
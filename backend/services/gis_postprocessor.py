@@ -1,16 +1,47 @@
 import logging
 import numpy as np
 import geojson
-from backend.core.object_storage import MinioClient
+import orjson
+from backend.core.object_storage import get_minio_client
+from backend.core.npy import load_npy
 import io
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# Optional JIT compiler for the flood depth kernel; a NumPy implementation is used without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _flood_depth_kernel(values, scale, offset, base):
+        """Computes values * scale + offset - base, clamping negative depths to zero, in a single pass."""
+        out = np.empty(values.size, dtype=np.float64)
+        for i in range(values.size):
+            depth = values[i] * scale + offset - base
+            out[i] = 0.0 if depth < 0.0 else depth
+        return out
+else:
+    def _flood_depth_kernel(values, scale, offset, base):
+        """Computes values * scale + offset - base, clamping negative depths to zero, into one output array."""
+        out = np.multiply(values, scale, dtype=np.float64)
+        out += offset
+        out -= base
+        np.copyto(out, 0.0, where=out < 0)
+        return out
+
+# Corners of a unit grid cell (x, y), counter-clockwise from its minimum corner and closed back on it
+_CELL_RING_OFFSETS = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
+
 class GISPostProcessorService:
     def __init__(self):
-        self.minio_client = MinioClient()
+        self.minio_client = get_minio_client()
 
     def _convert_solution_to_flood_depth(self, solution_vector: np.ndarray, parameters: dict) -> np.ndarray:
         """
@@ -26,15 +57,16 @@ class GISPostProcessorService:
         water_level_offset = parameters.get("water_level_offset", 0.0) # Example: constant water level increase
 
         # Simulate flood depth calculation: solution contributes to water level above base elevation
-        # Ensure non-negative depths
-        flood_depth = solution_vector * conversion_factor + water_level_offset - base_elevation
-        flood_depth[flood_depth < 0] = 0
-        return flood_depth
+        # Ensure non-negative depths (fused into one pass over the vector, with no temporaries)
+        solution_vector = np.ascontiguousarray(solution_vector)
+        flood_depth = _flood_depth_kernel(solution_vector.reshape(-1), float(conversion_factor), float(water_level_offset), float(base_elevation))
+        return flood_depth.reshape(solution_vector.shape)
 
-    def _generate_geojson_from_flood_depth(self, flood_depth: np.ndarray, job_id: str, parameters: dict) -> dict:
+    def _generate_geojson_from_flood_depth(self, flood_depth: np.ndarray, job_id: str, parameters: dict, flooded: np.ndarray | None = None) -> dict:
         """
         Generates a GeoJSON FeatureCollection representing flood polygons.
         Each grid cell exceeding the flood threshold is represented by a square polygon.
+        `flooded` is the precomputed `flood_depth > threshold` mask, if the caller already has it.
         """
         # Handle None parameters
         if parameters is None:
@@ -43,8 +75,6 @@ class GISPostProcessorService:
         grid_resolution = parameters.get("grid_resolution", 50)
         threshold = parameters.get("flood_threshold", 0.05) # Example threshold for flood depth
 
-        features = []
-
         # Reshape the 1D solution vector back into a 2D grid for visualization
         try:
             grid_depth = flood_depth.reshape((grid_resolution, grid_resolution))
@@ -58,36 +88,43 @@ class GISPostProcessorService:
             else:
                 return geojson.FeatureCollection([])
 
-        # Generate a square polygon for each flooded cell
-        for r in range(grid_resolution):
-            for c in range(grid_resolution):
-                if grid_depth[r, c] > threshold:
-                    # Define coordinates for the cell (assuming a simple 1x1 unit grid for visualization)
-                    # Adjust these coordinates if a real-world extent is available
-                    min_x, min_y = c, r
-                    max_x, max_y = c + 1, r + 1
-
-                    polygon = geojson.Polygon([[
-                        (min_x, min_y),
-                        (max_x, min_y),
-                        (max_x, max_y),
-                        (min_x, max_y),
-                        (min_x, min_y)
-                    ]])
-                    properties = {
-                        "job_id": job_id,
-                        "row": r,
-                        "col": c,
-                        "flood_depth": float(grid_depth[r, c]),
-                        "description": f"Flooded cell at ({r},{c})"
-                    }
-                    features.append(geojson.Feature(geometry=polygon, properties=properties))
-
-        return geojson.FeatureCollection(features)
-
-    def _generate_pdf_report(self, job_id: str, parameters: dict, geojson_path: str, solution_path: str, flood_depth: np.ndarray) -> bytes:
+        # Generate a square polygon for each flooded cell; the flooded cells are found in one vectorized pass,
+        # so only they are visited in Python (in row-major order, as before)
+        if flooded is None:
+            flooded = flood_depth > threshold
+        rows, cols = np.nonzero(flooded.reshape((grid_resolution, grid_resolution)))
+        depths = grid_depth[rows, cols]
+
+        # Define coordinates for the cells (assuming a simple 1x1 unit grid for visualization)
+        # Adjust these coordinates if a real-world extent is available.
+        # All rings are built as one (cells, 5, 2) array and converted to nested lists in a single call.
+        ring_x = cols[:, None] + _CELL_RING_OFFSETS[:, 0]
+        ring_y = rows[:, None] + _CELL_RING_OFFSETS[:, 1]
+        rings = np.stack([ring_x, ring_y], axis=-1).tolist()
+
+        # Features (and the collection) are plain dicts with the GeoJSON layout; geojson.FeatureCollection would
+        # convert every feature into geojson.Feature/Polygon objects, re-walking every coordinate
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+                "properties": {
+                    "job_id": job_id,
+                    "row": r,
+                    "col": c,
+                    "flood_depth": depth,
+                    "description": f"Flooded cell at ({r},{c})"
+                }
+            }
+            for ring, r, c, depth in zip(rings, rows.tolist(), cols.tolist(), depths.tolist())
+        ]
+
+        return {"type": "FeatureCollection", "features": features}
+
+    def _generate_pdf_report(self, job_id: str, parameters: dict, geojson_path: str, solution_path: str, flood_depth: np.ndarray, flooded: np.ndarray | None = None) -> bytes:
         """
         Generates a text-based PDF report with more detailed statistics and a simulated map.
+        `flooded` is the precomputed `flood_depth > threshold` mask, if the caller already has it.
         """
         # Handle None parameters
         if parameters is None:
@@ -96,39 +133,37 @@ class GISPostProcessorService:
         grid_resolution = parameters.get("grid_resolution", 50)
         threshold = parameters.get("flood_threshold", 0.05)
 
-        # Reshape flood_depth for map visualization, handle mismatch gracefully
+        if flooded is None:
+            flooded = flood_depth > threshold # One comparison serves both the statistics and the map
+
+        # Reshape the flooded mask for map visualization, handle mismatch gracefully
         try:
-            grid_depth = flood_depth.reshape((grid_resolution, grid_resolution))
+            grid_flooded = flooded.reshape((grid_resolution, grid_resolution))
         except ValueError:
-            grid_depth = np.zeros((grid_resolution, grid_resolution)) # Fallback to empty grid for map
+            grid_flooded = np.zeros((grid_resolution, grid_resolution), dtype=bool) # Fallback to empty grid for map
             logger.warning(f"[{job_id}] Could not reshape flood_depth for PDF map. Using empty grid.")
 
         # Calculate statistics
-        max_depth = np.max(flood_depth) if flood_depth.size > 0 else 0.0
-        min_depth = np.min(flood_depth) if flood_depth.size > 0 else 0.0
-        avg_depth = np.mean(flood_depth) if flood_depth.size > 0 else 0.0
-        flooded_cells_count = np.sum(flood_depth > threshold)
+        if flood_depth.size > 0:
+            min_depth, max_depth, avg_depth = np.nanmin(flood_depth), np.nanmax(flood_depth), np.nanmean(flood_depth)
+        else:
+            max_depth = min_depth = avg_depth = 0.0
+        flooded_cells_count = np.count_nonzero(flooded)
         total_cells = flood_depth.size
         flooded_percentage = (flooded_cells_count / total_cells * 100) if total_cells > 0 else 0.0
 
         # Generate ASCII art map
         map_lines = []
         map_lines.append("  " + "-" * (grid_resolution * 2 + 1))
-        for r in range(grid_resolution):
-            row_str = f"{r:2d}|"
-            for c in range(grid_resolution):
-                if grid_depth[r, c] > threshold:
-                    row_str += " F"
-                else:
-                    row_str += " ."
-            map_lines.append(row_str + " |")
+        map_cells = np.where(grid_flooded, " F", " .")
+        map_lines.extend(f"{r:2d}|{''.join(row)} |" for r, row in enumerate(map_cells.tolist()))
         map_lines.append("  " + "-" * (grid_resolution * 2 + 1))
         map_lines.append("    " + " ".join([f"{i%10}" for i in range(grid_resolution)]))
         ascii_map = "\n".join(map_lines)
 
         report_content = f"""
 Flood Simulation Report for Job ID: {job_id}
-Generated On: {datetime.now().isoformat()}
+Generated On: {datetime.now(timezone.utc).isoformat()}
 
 Solver Type: {parameters.get('solver_type', 'N/A')}
 Grid Resolution: {grid_resolution}x{grid_resolution}
@@ -160,28 +195,37 @@ Detailed flood extent data is available in the GeoJSON file.
         logger.info(f"[{job_id}] Starting GIS post-processing for solution: {solution_path}")
 
         # 1. Download raw solution (x) from object storage
-        solution_data = self.minio_client.download_file(solution_path)
-        solution_vector = np.load(io.BytesIO(solution_data))
+        solution_vector = load_npy(self.minio_client.download_buffer(solution_path)) # Zero-copy view over the downloaded bytes
         logger.info(f"[{job_id}] Loaded solution vector (shape: {solution_vector.shape}).")
 
         # 2. Convert solution to flood depth
         flood_depth = self._convert_solution_to_flood_depth(solution_vector, parameters)
         logger.info(f"[{job_id}] Converted solution to flood depth. Max depth: {np.max(flood_depth):.2f}")
 
-        # 3. Generate GeoJSON
-        geojson_data = self._generate_geojson_from_flood_depth(flood_depth, job_id, parameters)
-        geojson_str = geojson.dumps(geojson_data, indent=2)
+        # The flooded-cell mask is shared by the GeoJSON and the report instead of being recomputed by each
+        flooded = flood_depth > (parameters or {}).get("flood_threshold", 0.05)
 
+        # Object names are fixed up front so the report (which references the GeoJSON path) does not wait for it
         geojson_object_name = f"jobs/{job_id}/results/flood_data_{uuid.uuid4()}.geojson"
-        geojson_bytes = geojson_str.encode('utf-8')
-        self.minio_client.upload_file(geojson_object_name, io.BytesIO(geojson_bytes), len(geojson_bytes), "application/geo+json")
-        logger.info(f"[{job_id}] GeoJSON data saved to {geojson_object_name}")
+        pdf_object_name = f"jobs/{job_id}/results/flood_report_{uuid.uuid4()}.pdf"
 
-        # 4. Generate PDF report (as a text file for now)
-        pdf_content = self._generate_pdf_report(job_id, parameters, geojson_object_name, solution_path, flood_depth)
+        # 3. Generate GeoJSON
+        def build_and_upload_geojson():
+            geojson_data = self._generate_geojson_from_flood_depth(flood_depth, job_id, parameters, flooded=flooded)
+            geojson_bytes = orjson.dumps(geojson_data) # Compact UTF-8 bytes straight from C; no indentation or str round trip
+            self.minio_client.upload_file(geojson_object_name, io.BytesIO(geojson_bytes), len(geojson_bytes), "application/geo+json")
+            logger.info(f"[{job_id}] GeoJSON data saved to {geojson_object_name}")
 
-        pdf_object_name = f"jobs/{job_id}/results/flood_report_{uuid.uuid4()}.pdf"
-        self.minio_client.upload_file(pdf_object_name, io.BytesIO(pdf_content), len(pdf_content), "application/pdf")
-        logger.info(f"[{job_id}] PDF report saved to {pdf_object_name}")
+        # 4. Generate PDF report (as a text file for now)
+        def build_and_upload_pdf():
+            pdf_content = self._generate_pdf_report(job_id, parameters, geojson_object_name, solution_path, flood_depth, flooded=flooded)
+            self.minio_client.upload_file(pdf_object_name, io.BytesIO(pdf_content), len(pdf_content), "application/pdf")
+            logger.info(f"[{job_id}] PDF report saved to {pdf_object_name}")
+
+        # The two outputs are independent, so each one's upload overlaps with building the other
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(build_and_upload_geojson), pool.submit(build_and_upload_pdf)]
+        for future in futures:
+            future.result() # Re-raise the first failure, if any
 
         return geojson_object_name, pdf_object_name
@@ -1,11 +1,12 @@
 import logging
 from celery import shared_task
-from sqlalchemy.orm import Session
 from backend.core.database import SessionLocal
-from backend.models.job import Job, JobStatus, SolverType
-from backend.core.object_storage import MinioClient
-from backend.services.geospatial_processor import GeospatialProcessorService
+from backend.tasks.job_updates import update_job
+from backend.models.job import JobStatus, SolverType
+from backend.core.object_storage import get_minio_client
+from backend.services.geospatial_processor import GeospatialProcessorService, VSI_FILE_TYPES
 from backend.tasks.matrix_tasks import generate_matrix_task # Import the next task
+import io
 import uuid
 import os
 
@@ -17,97 +18,105 @@ except ImportError:
     MAGIC_AVAILABLE = False
     magic = None
 
+# One libmagic handle per process: the signature database is loaded once, not on a task's first detection
+_MIME_DETECTOR = magic.Magic(mime=True) if MAGIC_AVAILABLE else None
+
 logger = logging.getLogger(__name__)
 
+# Rasters and zip archives are recognised from this many leading bytes, so they need not be downloaded
+FILE_HEADER_BYTES = 8192
+
+def _detect_file_type(content: bytes | None, input_data_path: str) -> str:
+    """MIME type of the input data using python-magic, or from the file extension if it is not available."""
+    if MAGIC_AVAILABLE:
+        return _MIME_DETECTOR.from_buffer(content)
+    file_extension = input_data_path.lower().split('.')[-1] if '.' in input_data_path else ''
+    file_type_map = {
+        'tif': 'image/tiff',
+        'tiff': 'image/tiff',
+        'shp': 'application/x-shapefile',
+        'json': 'application/json',
+        'geojson': 'application/geo+json',
+        'txt': 'text/plain'
+    }
+    return file_type_map.get(file_extension, 'application/octet-stream')
+
 @shared_task(bind=True)
 def validate_and_preprocess_task(self, job_id: str, input_data_path: str | None, parameters: dict, solver_type: SolverType):
     logger.info(f"[{job_id}] Celery task 'validate_and_preprocess_task' started.")
-    db: Session = SessionLocal()
-    job = None
-    minio_client = MinioClient()
+    minio_client = get_minio_client()
     geospatial_processor = GeospatialProcessorService()
 
-    try:
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if not job:
+    with SessionLocal() as db:
+        # Marking the job RUNNING also tells whether it exists: one round trip instead of a query and a commit
+        if not update_job(db, job_id, status=JobStatus.RUNNING):
             logger.error(f"[{job_id}] Job not found in DB for geospatial processing. Aborting task.")
             return
-
-        job.status = JobStatus.RUNNING
-        db.add(job)
-        db.commit()
-        db.refresh(job)
         logger.info(f"[{job_id}] Job status updated to RUNNING for geospatial processing.")
 
-        if not input_data_path:
-            logger.warning(f"[{job_id}] No input_data_path provided. Skipping geospatial validation and pre-processing.")
-            # Proceed directly to matrix generation with existing parameters
-            generate_matrix_task.delay(job_id, None, parameters, solver_type)
-            return
+        try:
+            if not input_data_path:
+                logger.warning(f"[{job_id}] No input_data_path provided. Skipping geospatial validation and pre-processing.")
+                # Proceed directly to matrix generation with existing parameters
+                generate_matrix_task.delay(job_id, None, parameters, solver_type)
+                return
+
+            # 1. Check the object's size: an empty upload cannot be valid, and a ranged GET on it fails (HTTP 416)
+            input_size = minio_client.stat_file(input_data_path).size
+            if input_size == 0:
+                update_job(db, job_id, status=JobStatus.VALIDATION_FAILED, fallback_reason="Input data is empty.")
+                logger.error(f"[{job_id}] Input data at {input_data_path} is empty. Job status updated to {JobStatus.VALIDATION_FAILED}.")
+                return # Abort task
+
+            # 2. Content type detection. Rasters and zipped shapefiles are recognised from their header and read by
+            # GDAL straight from object storage; anything else is downloaded in full before it is classified, since
+            # libmagic only reports JSON for a complete document.
+            raw_file_content = None
+            if MAGIC_AVAILABLE:
+                logger.info(f"[{job_id}] Reading header of raw input data from {input_data_path}")
+                file_header = minio_client.download_partial(input_data_path, 0, min(input_size, FILE_HEADER_BYTES))
+                file_type = _detect_file_type(file_header, input_data_path)
+                if file_type not in VSI_FILE_TYPES:
+                    if input_size <= FILE_HEADER_BYTES:
+                        raw_file_content = file_header
+                    else:
+                        logger.info(f"[{job_id}] Downloading raw input data from {input_data_path}")
+                        raw_file_content = minio_client.download_file(input_data_path)
+                    file_type = _detect_file_type(raw_file_content, input_data_path)
+            else:
+                file_type = _detect_file_type(None, input_data_path)
+                if file_type not in VSI_FILE_TYPES:
+                    logger.info(f"[{job_id}] Downloading raw input data from {input_data_path}")
+                    raw_file_content = minio_client.download_file(input_data_path)
+            logger.info(f"[{job_id}] Detected file type: {file_type}")
+
+            # 3. Validate geospatial data
+            logger.info(f"[{job_id}] Validating raw input data.")
+            is_valid = geospatial_processor.validate_geospatial_data(raw_file_content, file_type, job_id, object_path=input_data_path)
+            if not is_valid:
+                update_job(db, job_id, status=JobStatus.VALIDATION_FAILED, fallback_reason="Geospatial data validation failed.")
+                logger.error(f"[{job_id}] Geospatial data validation failed. Job status updated to {JobStatus.VALIDATION_FAILED}.")
+                return # Abort task
+
+            # 4. Pre-process geospatial data
+            logger.info(f"[{job_id}] Pre-processing raw input data.")
+            preprocessed_content, preprocessed_content_type = geospatial_processor.preprocess_geospatial_data(raw_file_content, file_type, job_id, parameters, object_path=input_data_path)
+
+            # 5. Upload pre-processed data to object storage
+            preprocessed_object_name = f"jobs/{job_id}/preprocessed_data_{uuid.uuid4()}.json"
+            minio_client.upload_file(preprocessed_object_name, io.BytesIO(preprocessed_content), len(preprocessed_content), preprocessed_content_type)
+            logger.info(f"[{job_id}] Pre-processed data saved to {preprocessed_object_name}")
+
+            # 6. Update job with pre-processed data path
+            update_job(db, job_id, preprocessed_data_path=preprocessed_object_name)
+            logger.info(f"[{job_id}] Job updated with pre-processed data path. Dispatching matrix generation task.")
+
+            # 7. Dispatch the next task in the workflow
+            generate_matrix_task.delay(job_id, preprocessed_object_name, parameters, solver_type)
 
-        # 1. Download raw geospatial data
-        logger.info(f"[{job_id}] Downloading raw input data from {input_data_path}")
-        raw_file_content = minio_client.download_file(input_data_path)
-        
-        # 2. Robust content type detection using python-magic (if available)
-        if MAGIC_AVAILABLE:
-            file_type = magic.from_buffer(raw_file_content, mime=True)
-            logger.info(f"[{job_id}] Detected file type using python-magic: {file_type}")
-        else:
-            # Fallback to simple file extension detection
-            file_extension = input_data_path.lower().split('.')[-1] if '.' in input_data_path else ''
-            file_type_map = {
-                'tif': 'image/tiff',
-                'tiff': 'image/tiff', 
-                'shp': 'application/x-shapefile',
-                'json': 'application/json',
-                'geojson': 'application/geo+json',
-                'txt': 'text/plain'
-            }
-            file_type = file_type_map.get(file_extension, 'application/octet-stream')
-            logger.info(f"[{job_id}] Detected file type from extension: {file_type} (python-magic not available)")
-        
-
-        # 3. Validate geospatial data
-        logger.info(f"[{job_id}] Validating raw input data.")
-        is_valid = geospatial_processor.validate_geospatial_data(raw_file_content, file_type, job_id)
-        if not is_valid:
-            job.status = JobStatus.VALIDATION_FAILED
-            job.fallback_reason = "Geospatial data validation failed."
-            db.add(job)
-            db.commit()
-            db.refresh(job)
-            logger.error(f"[{job_id}] Geospatial data validation failed. Job status updated to {job.status}.")
-            return # Abort task
-
-        # 4. Pre-process geospatial data
-        logger.info(f"[{job_id}] Pre-processing raw input data.")
-        preprocessed_content, preprocessed_content_type = geospatial_processor.preprocess_geospatial_data(raw_file_content, file_type, job_id, parameters)
-
-        # 5. Upload pre-processed data to object storage
-        preprocessed_object_name = f"jobs/{job_id}/preprocessed_data_{uuid.uuid4()}.json"
-        minio_client.upload_file(preprocessed_object_name, preprocessed_content, len(preprocessed_content), preprocessed_content_type)
-        logger.info(f"[{job_id}] Pre-processed data saved to {preprocessed_object_name}")
-
-        # 6. Update job with pre-processed data path
-        job.preprocessed_data_path = preprocessed_object_name
-        db.add(job)
-        db.commit()
-        db.refresh(job)
-        logger.info(f"[{job_id}] Job updated with pre-processed data path. Dispatching matrix generation task.")
-
-        # 7. Dispatch the next task in the workflow
-        generate_matrix_task.delay(job_id, preprocessed_object_name, parameters, solver_type)
-
-    except Exception as e:
-        logger.error(f"[{job_id}] Geospatial processing failed: {e}", exc_info=True)
-        if job:
-            job.status = JobStatus.PREPROCESSING_FAILED
-            job.fallback_reason = f"Geospatial pre-processing failed: {e}"
-            db.add(job)
-            db.commit()
-            db.refresh(job)
+        except Exception as e:
+            logger.error(f"[{job_id}] Geospatial processing failed: {e}", exc_info=True)
+            db.rollback()
+            update_job(db, job_id, status=JobStatus.PREPROCESSING_FAILED, fallback_reason=f"Geospatial pre-processing failed: {e}")
             logger.info(f"[{job_id}] Job status updated to FAILED due to geospatial processing error.")
-        raise # Re-raise to let Celery mark the task as failed
-    finally:
-        db.close()
+            raise # Re-raise to let Celery mark the task as failed
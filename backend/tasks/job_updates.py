@@ -0,0 +1,13 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from backend.models.job import Job
+
+def update_job(db: Session, job_id: str, *conditions, **values) -> bool:
+    """
+    Writes the given columns of a job row in a single UPDATE, optionally guarded by further WHERE conditions, and
+    commits. Returns whether a row matched, which tells a missing job (or one the conditions excluded) apart
+    without a SELECT. Job rows are never loaded into the session, so nothing has to be refreshed afterwards.
+    """
+    matched = db.execute(update(Job).where(Job.id == job_id, *conditions).values(**values)).rowcount
+    db.commit()
+    return matched > 0
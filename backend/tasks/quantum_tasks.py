@@ -1,7 +1,8 @@
 import logging
 from celery import shared_task
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from backend.core.database import SessionLocal
+from backend.tasks.job_updates import update_job
 from backend.models.job import Job, JobStatus, SolverType
 from backend.services.quantum_solver import QuantumSolverService
 from backend.tasks.solver_tasks import classical_solve_task # Import classical solver for fallback
@@ -13,54 +14,39 @@ logger = logging.getLogger(__name__)
 def quantum_solve_task(self, job_id: str, matrix_path: str, vector_path: str, parameters: dict, is_fallback_attempt: bool = False):
     log_prefix = f"[{job_id}]"
     logger.info(f"{log_prefix} Celery task 'quantum_solve_task' started.")
-    db: Session = SessionLocal()
-    job = None # Initialize job to None
-    try:
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if not job:
+    with SessionLocal() as db:
+        # Update job status to running for this specific step if it's not already failed. The condition is part of
+        # the UPDATE, so the row is only read when nothing matched, to tell a failed job from a missing one.
+        if update_job(db, job_id, Job.status != JobStatus.FAILED, status=JobStatus.RUNNING):
+            logger.info(f"{log_prefix} Job status updated to RUNNING for quantum HHL solve.")
+        elif db.execute(select(Job.status).where(Job.id == job_id)).scalar_one_or_none() is None:
             logger.error(f"{log_prefix} Job not found in DB for quantum HHL solve. Aborting task.")
             return
 
-        # Update job status to running for this specific step if it's not already failed
-        if job.status != JobStatus.FAILED:
-            job.status = JobStatus.RUNNING
-            db.add(job)
-            db.commit()
-            db.refresh(job)
-            logger.info(f"{log_prefix} Job status updated to RUNNING for quantum HHL solve.")
-
-        quantum_solver = QuantumSolverService()
-        solution_path = quantum_solver.solve_hhl(matrix_path, vector_path, job_id, parameters)
+        try:
+            quantum_solver = QuantumSolverService()
+            solution_path = quantum_solver.solve_hhl(matrix_path, vector_path, job_id, parameters)
 
-        job.solution_path = solution_path
-        job.status = JobStatus.COMPLETED # Mark job as completed after successful solve
-        db.add(job)
-        db.commit()
-        db.refresh(job)
-        logger.info(f"{log_prefix} Quantum HHL solve completed successfully. Solution saved to {solution_path}. Job status updated to COMPLETED.")
+            # Mark job as completed after successful solve
+            update_job(db, job_id, solution_path=solution_path, status=JobStatus.COMPLETED)
+            logger.info(f"{log_prefix} Quantum HHL solve completed successfully. Solution saved to {solution_path}. Job status updated to COMPLETED.")
 
-        # Dispatch post-processing task
-        gis_postprocess_task.delay(job_id, solution_path, parameters)
+            # Dispatch post-processing task
+            gis_postprocess_task.delay(job_id, solution_path, parameters)
 
-    except Exception as e:
-        logger.error(f"{log_prefix} Quantum HHL solve failed: {e}", exc_info=True)
-        if job:
-            if job.solver_type == SolverType.HYBRID and not is_fallback_attempt:
-                job.status = JobStatus.QUANTUM_FAILED_FALLBACK_INITIATED
-                job.fallback_reason = f"Quantum solver failed: {e}. Initiating classical fallback."
-                db.add(job)
-                db.commit()
-                db.refresh(job)
+        except Exception as e:
+            logger.error(f"{log_prefix} Quantum HHL solve failed: {e}", exc_info=True)
+            db.rollback()
+            solver_type = db.execute(select(Job.solver_type).where(Job.id == job_id)).scalar_one_or_none() # Only needed on failure; None (row gone) is handled as not hybrid
+            if solver_type == SolverType.HYBRID and not is_fallback_attempt:
+                update_job(db, job_id, 
+                    status=JobStatus.QUANTUM_FAILED_FALLBACK_INITIATED,
+                    fallback_reason=f"Quantum solver failed: {e}. Initiating classical fallback."
+                )
                 logger.warning(f"{log_prefix} Quantum solve failed for HYBRID job. Initiating classical fallback.")
                 # Dispatch classical fallback task
                 classical_solve_task.delay(job_id, matrix_path, vector_path, parameters, is_fallback_attempt=True)
             else:
-                job.status = JobStatus.FAILED
-                job.fallback_reason = f"Quantum solver failed: {e}"
-                db.add(job)
-                db.commit()
-                db.refresh(job)
+                update_job(db, job_id, status=JobStatus.FAILED, fallback_reason=f"Quantum solver failed: {e}")
                 logger.info(f"{log_prefix} Job status updated to FAILED due to quantum HHL solve error.")
-        raise # Re-raise to let Celery mark the task as failed
-    finally:
-        db.close()
+            raise # Re-raise to let Celery mark the task as failed
@@ -1,7 +1,8 @@
 import logging
 from celery import shared_task
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from backend.core.database import SessionLocal
+from backend.tasks.job_updates import update_job
 from backend.models.job import Job, JobStatus
 from backend.models.performance_log import PerformanceLog # New: Import PerformanceLog model
 from backend.schemas.performance_log import PerformanceLogCreate # New: Import PerformanceLogCreate schema
@@ -14,56 +15,45 @@ logger = logging.getLogger(__name__)
 def classical_solve_task(self, job_id: str, matrix_path: str, vector_path: str, parameters: dict, is_fallback_attempt: bool = False):
     log_prefix = f"[{job_id}] {'[FALLBACK]' if is_fallback_attempt else ''}"
     logger.info(f"{log_prefix} Celery task 'classical_solve_task' started.")
-    db: Session = SessionLocal()
-    job = None # Initialize job to None
-    try:
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if not job:
+    with SessionLocal() as db:
+        # Update job status to running for this specific step if it's not already failed. The condition is part of
+        # the UPDATE, so the row is only read when nothing matched, to tell a failed job from a missing one.
+        job_status = JobStatus.FALLBACK_CLASSICAL_RUNNING if is_fallback_attempt else JobStatus.RUNNING
+        if update_job(db, job_id, Job.status.not_in([JobStatus.FAILED, JobStatus.FALLBACK_CLASSICAL_FAILED]), status=job_status):
+            logger.info(f"{log_prefix} Job status updated to {job_status} for classical solve.")
+        elif db.execute(select(Job.status).where(Job.id == job_id)).scalar_one_or_none() is None:
             logger.error(f"{log_prefix} Job not found in DB for classical solve. Aborting task.")
             return
 
-        # Update job status to running for this specific step if it's not already failed
-        if job.status not in [JobStatus.FAILED, JobStatus.FALLBACK_CLASSICAL_FAILED]:
-            job.status = JobStatus.FALLBACK_CLASSICAL_RUNNING if is_fallback_attempt else JobStatus.RUNNING
-            db.add(job)
-            db.commit()
-            db.refresh(job)
-            logger.info(f"{log_prefix} Job status updated to {job.status} for classical solve.")
+        try:
+            classical_solver = ClassicalSolverService()
+            solution_path, performance_metrics = classical_solver.solve_classical(matrix_path, vector_path, job_id, parameters) # New: Receive metrics
 
-        classical_solver = ClassicalSolverService()
-        solution_path, performance_metrics = classical_solver.solve_classical(matrix_path, vector_path, job_id, parameters) # New: Receive metrics
+            # Store performance metrics
+            performance_log_create = PerformanceLogCreate(
+                job_id=job_id,
+                step_name=performance_metrics["step_name"],
+                execution_time_seconds=performance_metrics["execution_time_seconds"],
+                peak_memory_mb=performance_metrics["peak_memory_mb"],
+                cpu_utilization_percent=performance_metrics["cpu_utilization_percent"]
+            )
+            db.add(PerformanceLog(**performance_log_create.model_dump()))
 
-        # Store performance metrics
-        performance_log_create = PerformanceLogCreate(
-            job_id=job_id,
-            step_name=performance_metrics["step_name"],
-            execution_time_seconds=performance_metrics["execution_time_seconds"],
-            peak_memory_mb=performance_metrics["peak_memory_mb"],
-            cpu_utilization_percent=performance_metrics["cpu_utilization_percent"]
-        )
-        db_performance_log = PerformanceLog(**performance_log_create.model_dump())
-        db.add(db_performance_log)
-        
-        job.solution_path = solution_path
-        job.status = JobStatus.FALLBACK_CLASSICAL_COMPLETED if is_fallback_attempt else JobStatus.COMPLETED
-        job.latest_performance_metrics = performance_metrics # New: Update latest performance metrics
-        db.add(job)
-        db.commit()
-        db.refresh(job)
-        logger.info(f"{log_prefix} Classical solve completed successfully. Solution saved to {solution_path}. Job status updated to {job.status}. Performance logged.")
+            job_status = JobStatus.FALLBACK_CLASSICAL_COMPLETED if is_fallback_attempt else JobStatus.COMPLETED
+            update_job(db, job_id, 
+                solution_path=solution_path,
+                status=job_status,
+                latest_performance_metrics=performance_metrics # New: Update latest performance metrics
+            )
+            logger.info(f"{log_prefix} Classical solve completed successfully. Solution saved to {solution_path}. Job status updated to {job_status}. Performance logged.")
 
-        # Dispatch post-processing task
-        gis_postprocess_task.delay(job_id, solution_path, parameters)
+            # Dispatch post-processing task
+            gis_postprocess_task.delay(job_id, solution_path, parameters)
 
-    except Exception as e:
-        logger.error(f"{log_prefix} Classical solve failed: {e}", exc_info=True)
-        if job:
-            job.status = JobStatus.FALLBACK_CLASSICAL_FAILED if is_fallback_attempt else JobStatus.FAILED
-            job.fallback_reason = f"Classical solve failed: {e}" if is_fallback_attempt else None
-            db.add(job)
-            db.commit()
-            db.refresh(job)
-            logger.info(f"{log_prefix} Job status updated to {job.status} due to classical solve error.")
-        raise # Re-raise to let Celery mark the task as failed
-    finally:
-        db.close()
+        except Exception as e:
+            logger.error(f"{log_prefix} Classical solve failed: {e}", exc_info=True)
+            db.rollback()
+            job_status = JobStatus.FALLBACK_CLASSICAL_FAILED if is_fallback_attempt else JobStatus.FAILED
+            update_job(db, job_id, status=job_status, fallback_reason=f"Classical solve failed: {e}" if is_fallback_attempt else None)
+            logger.info(f"{log_prefix} Job status updated to {job_status} due to classical solve error.")
+            raise # Re-raise to let Celery mark the task as failed
@@ -0,0 +1,152 @@
+import logging
+import os
+import socket
+import time
+import redis
+from sqlalchemy import select
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.core.job_stream import get_redis, decode_validate_job
+from backend.models.job import Job, JobStatus
+from backend.tasks.geospatial_tasks import validate_and_preprocess_task
+from backend.tasks.job_updates import update_job
+
+logger = logging.getLogger(__name__)
+
+# Job states in which validate_and_preprocess_task has recorded its own failure
+_FAILED_STATUSES = (JobStatus.VALIDATION_FAILED, JobStatus.PREPROCESSING_FAILED, JobStatus.FAILED)
+
+# Pending entries are inspected (and possibly reclaimed) in batches of this size
+_RECLAIM_BATCH_SIZE = 100
+
+def _ensure_consumer_group(client: redis.Redis):
+    try:
+        client.xgroup_create(settings.VALIDATE_STREAM_NAME, settings.VALIDATE_STREAM_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e): # Group already exists
+            raise
+
+def _ack(client: redis.Redis, entry_id):
+    client.xack(settings.VALIDATE_STREAM_NAME, settings.VALIDATE_STREAM_GROUP, entry_id)
+
+def _failure_recorded(job_id: str) -> bool:
+    """Whether the job row records a failure (or no longer exists), so there is nothing left to retry."""
+    with SessionLocal() as db:
+        status = db.execute(select(Job.status).where(Job.id == job_id)).scalar_one_or_none()
+    return status is None or status in _FAILED_STATUSES
+
+def _handle_entry(client: redis.Redis, entry_id, fields: dict):
+    """
+    Runs validate_and_preprocess_task for a stream entry. The entry is acknowledged once the task has finished,
+    or once its failure is recorded on the job row; otherwise (e.g. the DB was unreachable) it stays pending
+    and is redelivered by _reclaim_pending.
+    """
+    job_id = None
+    try:
+        task_args = decode_validate_job(fields)
+        job_id = task_args[0]
+        validate_and_preprocess_task(*task_args)
+    except Exception as e:
+        logger.error(f"Validate stream entry {entry_id!r} failed: {e}", exc_info=True)
+        try:
+            failure_recorded = job_id is not None and _failure_recorded(job_id)
+        except Exception as db_error:
+            logger.error(f"Could not read the status of job {job_id} for stream entry {entry_id!r}: {db_error}")
+            failure_recorded = False
+        if not failure_recorded:
+            logger.warning(f"Validate stream entry {entry_id!r} left pending for redelivery.")
+            return
+    _ack(client, entry_id)
+
+def _give_up_entry(client: redis.Redis, entry_id):
+    """Marks the job of an entry that keeps failing as PREPROCESSING_FAILED, unless it got further, and acknowledges it."""
+    entries = client.xrange(settings.VALIDATE_STREAM_NAME, min=entry_id, max=entry_id)
+    if entries:
+        try:
+            job_id = decode_validate_job(entries[0][1])[0]
+        except Exception as e:
+            logger.error(f"Validate stream entry {entry_id!r} cannot be decoded: {e}")
+        else:
+            with SessionLocal() as db:
+                update_job(
+                    db,
+                    job_id,
+                    Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+                    status=JobStatus.PREPROCESSING_FAILED,
+                    fallback_reason=f"Validation was attempted {settings.VALIDATE_STREAM_MAX_DELIVERIES} times without completing."
+                )
+    logger.error(f"Giving up on validate stream entry {entry_id!r} after {settings.VALIDATE_STREAM_MAX_DELIVERIES} deliveries.")
+    _ack(client, entry_id)
+
+def _reclaim_pending(client: redis.Redis, consumer_name: str) -> list:
+    """
+    Claims entries that were delivered but not acknowledged for VALIDATE_STREAM_CLAIM_IDLE_SECONDS, whether their
+    consumer crashed or their task failed without recording it, and returns them to be run again. Entries already
+    delivered VALIDATE_STREAM_MAX_DELIVERIES times are given up on instead.
+    """
+    min_idle_ms = settings.VALIDATE_STREAM_CLAIM_IDLE_SECONDS * 1000
+    pending = client.xpending_range(
+        settings.VALIDATE_STREAM_NAME,
+        settings.VALIDATE_STREAM_GROUP,
+        min="-",
+        max="+",
+        count=_RECLAIM_BATCH_SIZE,
+        idle=min_idle_ms
+    )
+    retry_ids = []
+    for entry in pending:
+        if entry["times_delivered"] >= settings.VALIDATE_STREAM_MAX_DELIVERIES:
+            _give_up_entry(client, entry["message_id"])
+        else:
+            retry_ids.append(entry["message_id"])
+    if not retry_ids:
+        return []
+
+    # XCLAIM re-checks the idle time, so an entry another consumer claimed in the meantime is not taken twice
+    claimed = []
+    for entry_id, fields in client.xclaim(settings.VALIDATE_STREAM_NAME, settings.VALIDATE_STREAM_GROUP, consumer_name, min_idle_ms, retry_ids):
+        if fields:
+            claimed.append((entry_id, fields))
+        else:
+            _ack(client, entry_id) # Trimmed from the stream (MAXLEN); there is nothing left to run
+    if claimed:
+        logger.info(f"Reclaimed {len(claimed)} pending validate stream entries.")
+    return claimed
+
+def consume_validate_stream(consumer_name: str | None = None):
+    """
+    Reads validate/pre-process requests from the validate stream as part of a consumer group and runs
+    validate_and_preprocess_task in-process for each one.
+
+    Each consumer handles one entry at a time, so validation throughput scales with the number of consumers:
+    run several processes (e.g. `docker compose up --scale stream_consumer=4`). Every process joins the group
+    under its own name (host and PID by default) and reads one entry per call, leaving the rest of the stream
+    to idle consumers. Unacknowledged entries, including those of a consumer that died, are reclaimed at
+    startup and every VALIDATE_STREAM_CLAIM_INTERVAL_SECONDS.
+    """
+    client = get_redis()
+    consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+    _ensure_consumer_group(client)
+    logger.info(f"Consuming stream '{settings.VALIDATE_STREAM_NAME}' as '{consumer_name}' in group '{settings.VALIDATE_STREAM_GROUP}'.")
+
+    next_reclaim = 0.0 # Reclaim on startup
+    while True:
+        if time.monotonic() >= next_reclaim:
+            for entry_id, fields in _reclaim_pending(client, consumer_name):
+                _handle_entry(client, entry_id, fields)
+            next_reclaim = time.monotonic() + settings.VALIDATE_STREAM_CLAIM_INTERVAL_SECONDS
+
+        response = client.xreadgroup(
+            settings.VALIDATE_STREAM_GROUP,
+            consumer_name,
+            {settings.VALIDATE_STREAM_NAME: ">"},
+            count=1,
+            block=5000
+        )
+        for _stream, entries in response or []:
+            for entry_id, fields in entries:
+                _handle_entry(client, entry_id, fields)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    consume_validate_stream()
@@ -12,13 +12,17 @@ Requirements:
 """
 
 import requests
-import json
+import orjson
 import time
 
 # Configuration
 API_BASE_URL = "http://localhost:8000/api/v1"
 API_KEY = "YOUR_API_KEY_HERE"  # Replace with your actual API key
 
+# One session for every request: keep-alive reuses the connection to the API instead of opening one per call
+SESSION = requests.Session()
+SESSION.headers.update({"X-API-Key": API_KEY})
+
 def submit_classical_job():
     """Submit a flood simulation job using the classical solver."""
     
@@ -34,10 +38,10 @@ def submit_classical_job():
     
     # Submit the job
     print("🚀 Submitting classical solver job...")
-    response = requests.post(
+    response = SESSION.post(
         f"{API_BASE_URL}/solve",
-        json=job_data,
-        headers={"X-API-Key": API_KEY}
+        data=orjson.dumps(job_data),
+        headers={"Content-Type": "application/json"}
     )
     
     if response.status_code != 202:
@@ -45,7 +49,7 @@ def submit_classical_job():
         print(response.text)
         return None
     
-    job = response.json()
+    job = orjson.loads(response.content)
     job_id = job["id"]
     print(f"✅ Job submitted: {job_id}")
     print(f"   Status: {job['status']}")
@@ -57,18 +61,18 @@ def wait_for_completion(job_id, timeout=60):
     
     print(f"\n⏳ Waiting for job to complete...")
     start_time = time.time()
+    polls = 0
     
     while time.time() - start_time < timeout:
-        response = requests.get(
-            f"{API_BASE_URL}/jobs/{job_id}",
-            headers={"X-API-Key": API_KEY}
+        response = SESSION.get(
+            f"{API_BASE_URL}/jobs/{job_id}"
         )
         
         if response.status_code != 200:
             print(f"❌ Error checking status: {response.status_code}")
             return None
         
-        job = response.json()
+        job = orjson.loads(response.content)
         status = job["status"]
         
         print(f"   Status: {status}", end="\r")
@@ -82,7 +86,10 @@ def wait_for_completion(job_id, timeout=60):
                 print(f"   Reason: {job['fallback_reason']}")
             return None
         
-        time.sleep(2)
+        # Exponential backoff from 100 ms up to 2 s: short jobs are picked up almost as soon as they finish,
+        # long ones are not polled more often than before
+        time.sleep(min(2.0, 0.1 * 1.5 ** polls))
+        polls += 1
     
     print(f"\n⏱️  Timeout after {timeout}s")
     return None
@@ -1,10 +1,13 @@
 import pytest
 from unittest.mock import MagicMock
-from app.core.object_storage import MinioClient
+from app.core.object_storage import MinioClient, get_minio_client
 
 @pytest.fixture
 def mock_minio_client(mocker):
     """Fixture to mock MinioClient for isolated testing."""
     mock_client = MagicMock(spec=MinioClient)
+    mock_client.file_exists.return_value = False # The bucket starts out empty
     mocker.patch('app.core.object_storage.MinioClient', return_value=mock_client)
-    return mock_client
+    get_minio_client.cache_clear() # Services share a cached client; make the next lookup return the mock
+    yield mock_client
+    get_minio_client.cache_clear()
@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import HTTPException
+from app import dependencies
+from app.core.config import settings
+from app.core.security import hash_api_key
+from app.dependencies import get_api_key
+from app.models.api_key import APIKey
+
+@pytest.fixture(autouse=True)
+def empty_api_key_cache():
+    dependencies._api_key_cache.clear()
+    yield
+    dependencies._api_key_cache.clear()
+
+@pytest.fixture
+def clock(mocker):
+    """Controls the monotonic clock the cache expires entries by."""
+    now = [1000.0]
+    mocker.patch.object(dependencies.time, "monotonic", side_effect=lambda: now[0])
+    return now
+
+def _mock_db(*active_keys: str):
+    """An AsyncSession stand-in whose API key lookup finds the given raw keys."""
+    stored = {hash_api_key(key): APIKey(id=f"id-{key}", hashed_key=hash_api_key(key), is_active=True) for key in active_keys}
+    db = MagicMock()
+    async def execute(statement):
+        hashed_key = statement.compile().params["hashed_key_1"]
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = stored.get(hashed_key)
+        return result
+    db.execute = AsyncMock(side_effect=execute)
+    return db, stored
+
+def _authenticate(raw_key, db):
+    return asyncio.run(get_api_key(api_key=raw_key, db=db))
+
+def test_verified_key_is_served_from_cache(clock):
+    db, _ = _mock_db("key-a")
+
+    first = _authenticate("key-a", db)
+    second = _authenticate("key-a", db)
+
+    assert first is second
+    assert db.execute.await_count == 1 # The second request did not query the DB
+
+def test_cached_key_is_rechecked_after_ttl(clock, mocker):
+    mocker.patch.object(settings, "API_KEY_CACHE_TTL_SECONDS", 60)
+    db, stored = _mock_db("key-a")
+    _authenticate("key-a", db)
+
+    # Deactivated in the DB: still accepted from the cache until the TTL runs out
+    stored.clear()
+    clock[0] += 59
+    assert _authenticate("key-a", db).id == "id-key-a"
+    assert db.execute.await_count == 1
+
+    clock[0] += 2
+    with pytest.raises(HTTPException) as exc_info:
+        _authenticate("key-a", db)
+    assert exc_info.value.status_code == 401
+    assert db.execute.await_count == 2
+
+def test_least_recently_used_key_is_evicted(clock, mocker):
+    mocker.patch.object(dependencies, "_API_KEY_CACHE_MAX_SIZE", 2)
+    db, _ = _mock_db("key-a", "key-b", "key-c")
+
+    _authenticate("key-a", db)
+    _authenticate("key-b", db)
+    _authenticate("key-a", db) # key-a is now the most recently used
+    _authenticate("key-c", db) # Evicts key-b
+    assert db.execute.await_count == 3
+
+    assert set(dependencies._api_key_cache) == {hash_api_key("key-a"), hash_api_key("key-c")}
+    _authenticate("key-a", db)
+    assert db.execute.await_count == 3
+    _authenticate("key-b", db)
+    assert db.execute.await_count == 4
+
+def test_zero_ttl_disables_cache(clock, mocker):
+    mocker.patch.object(settings, "API_KEY_CACHE_TTL_SECONDS", 0)
+    db, _ = _mock_db("key-a")
+
+    _authenticate("key-a", db)
+    _authenticate("key-a", db)
+
+    assert db.execute.await_count == 2
+    assert not dependencies._api_key_cache
+
+def test_invalid_key_is_not_cached(clock):
+    db, _ = _mock_db("key-a")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            _authenticate("wrong-key", db)
+
+    assert db.execute.await_count == 2
+    assert not dependencies._api_key_cache
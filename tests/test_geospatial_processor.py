@@ -6,7 +6,7 @@ from unittest.mock import MagicMock
 from app.services.geospatial_processor import GeospatialProcessorService
 import rasterio
 import fiona
-from jsonschema import ValidationError
+import pyogrio
 
 # Mock rasterio.open to avoid actual file system/GDAL dependencies
 @pytest.fixture
@@ -19,6 +19,8 @@ def mock_rasterio_open(mocker):
     mock_src.res = (1.0, 1.0)
     mock_src.bounds = rasterio.coords.BoundingBox(left=0, bottom=0, right=100, top=50)
     mock_src.nodata = -9999
+    mock_src.dtypes = ('float32',)
+    mock_src.block_windows.return_value = [((0, 0), None)]
     mock_src.read.return_value = np.array([[10, 20], [30, 40]], dtype=np.float32)
     mocker.patch('rasterio.open', return_value=mock_src)
     return mock_src
@@ -35,6 +37,18 @@ def mock_fiona_open(mocker):
     mocker.patch('fiona.open', return_value=mock_src)
     return mock_src
 
+# Mock pyogrio.read_info for shapefile metadata reads
+@pytest.fixture
+def mock_pyogrio_read_info(mocker):
+    info = {
+        'driver': 'ESRI Shapefile',
+        'crs': 'EPSG:4326',
+        'features': 1, # Simulate one feature
+        'total_bounds': (0.0, 0.0, 10.0, 5.0),
+        'geometry_type': 'Polygon'
+    }
+    return mocker.patch('pyogrio.read_info', return_value=info)
+
 @pytest.fixture
 def geospatial_service():
     return GeospatialProcessorService()
@@ -56,20 +70,41 @@ class TestGeospatialProcessorService:
             assert geospatial_service.validate_geospatial_data(file_content, file_type, self.job_id) is False
         assert "GeoTIFF validation failed: No raster bands found." in caplog.text
 
-    def test_validate_shapefile_successfully(self, geospatial_service, mock_fiona_open):
+    def test_validate_shapefile_successfully(self, geospatial_service, mock_pyogrio_read_info):
+        file_content = b'dummy_shapefile_zip_content'
+        file_type = 'application/zip'
+        assert geospatial_service.validate_geospatial_data(file_content, file_type, self.job_id) is True
+        mock_pyogrio_read_info.assert_called_once()
+
+    def test_validate_shapefile_without_pyogrio_uses_fiona(self, geospatial_service, mock_fiona_open, mocker):
+        mocker.patch('app.services.geospatial_processor.PYOGRIO_AVAILABLE', False)
         file_content = b'dummy_shapefile_zip_content'
         file_type = 'application/zip'
         assert geospatial_service.validate_geospatial_data(file_content, file_type, self.job_id) is True
         mock_fiona_open.assert_called_once()
 
-    def test_validate_shapefile_no_features_warns(self, geospatial_service, mock_fiona_open, caplog):
-        mock_fiona_open.return_value.__len__.return_value = 0
+    def test_validate_shapefile_no_features_warns(self, geospatial_service, mock_pyogrio_read_info, caplog):
+        mock_pyogrio_read_info.return_value['features'] = 0
         file_content = b'dummy_shapefile_zip_content'
         file_type = 'application/zip'
         with caplog.at_level('WARNING'):
             assert geospatial_service.validate_geospatial_data(file_content, file_type, self.job_id) is True # Still valid, just empty
         assert "Shapefile validation warning: No features found." in caplog.text
 
+    def test_read_vector_info_from_object_storage_scopes_gdal_config(self, geospatial_service, mock_pyogrio_read_info):
+        seen = {}
+        def read_info(source, **kwargs):
+            seen['source'] = source
+            seen['endpoint'] = pyogrio.get_gdal_config_option('AWS_S3_ENDPOINT')
+            return mock_pyogrio_read_info.return_value
+        mock_pyogrio_read_info.side_effect = read_info
+        info = geospatial_service._read_vector_info(None, "jobs/test-job-id/input.zip")
+        assert info["feature_count"] == 1
+        assert seen['source'].startswith("/vsizip//vsis3/")
+        assert seen['endpoint'] is not None # The MinIO options are set while GDAL reads the object...
+        assert pyogrio.get_gdal_config_option('AWS_S3_ENDPOINT') is None # ...and not left behind for later GDAL calls
+        assert pyogrio.get_gdal_config_option('AWS_SECRET_ACCESS_KEY') is None
+
     def test_validate_json_config_successfully(self, geospatial_service):
         file_content = b'{"grid_resolution": 10, "custom_param": "value"}'
         file_type = 'application/json'
@@ -150,7 +185,7 @@ class TestGeospatialProcessorService:
         assert content_type == 'application/json'
         assert metadata['extracted_parameters']['grid_resolution'] == 30
 
-    def test_preprocess_shapefile_extracts_metadata(self, geospatial_service, mock_fiona_open):
+    def test_preprocess_shapefile_extracts_metadata(self, geospatial_service, mock_pyogrio_read_info):
         file_content = b'dummy_shapefile_zip_content'
         file_type = 'application/zip'
         parameters = {}
@@ -162,8 +197,10 @@ class TestGeospatialProcessorService:
         assert metadata['original_file_type'] == file_type
         assert 'bounds' in metadata['extracted_parameters']
         assert 'feature_count' in metadata['extracted_parameters']
+        assert metadata['extracted_parameters']['feature_count'] == 1
+        assert metadata['extracted_parameters']['bounds'] == {'left': 0.0, 'bottom': 0.0, 'right': 10.0, 'top': 5.0}
         assert 'crs' in metadata['extracted_parameters']
-        mock_fiona_open.assert_called_once()
+        mock_pyogrio_read_info.assert_called_once()
 
     def test_preprocess_unknown_file_types_gracefully(self, geospatial_service, caplog):
         file_content = b'some_binary_data'
@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
 import geojson
+import json
 from app.services.gis_postprocessor import GISPostProcessorService
 import io
 from datetime import datetime
@@ -120,7 +121,7 @@ def test_postprocess_solution_uploads_files(mock_minio_client):
     solution_bio = io.BytesIO()
     np.save(solution_bio, solution_vector)
     solution_bio.seek(0)
-    mock_minio_client.download_file.return_value = solution_bio.getvalue()
+    mock_minio_client.download_buffer.return_value = solution_bio.getvalue()
     mock_minio_client.upload_file.return_value = None
 
     geojson_path, pdf_report_path = service.postprocess_solution(solution_path, job_id, parameters)
@@ -129,21 +130,24 @@ def test_postprocess_solution_uploads_files(mock_minio_client):
     assert pdf_report_path.startswith(f"jobs/{job_id}/results/flood_report_")
 
     # Verify download call
-    mock_minio_client.download_file.assert_called_once_with(solution_path)
+    mock_minio_client.download_buffer.assert_called_once_with(solution_path)
 
     # Verify upload calls (GeoJSON and PDF)
     assert mock_minio_client.upload_file.call_count == 2
 
+    # The two outputs are uploaded concurrently, so the calls are matched by object name rather than order
+    upload_calls = {call.args[0]: call for call in mock_minio_client.upload_file.call_args_list}
+
     # Check GeoJSON upload
-    geojson_call = mock_minio_client.upload_file.call_args_list[0]
+    geojson_call = upload_calls[geojson_path]
     assert geojson_call.args[0] == geojson_path
     assert geojson_call.args[3] == "application/geo+json"
-    uploaded_geojson = json.loads(geojson_call.args[1].decode('utf-8'))
+    uploaded_geojson = json.loads(geojson_call.args[1].getvalue().decode('utf-8'))
     assert len(uploaded_geojson["features"]) > 0 # Should have flooded cells
 
     # Check PDF upload
-    pdf_call = mock_minio_client.upload_file.call_args_list[1]
+    pdf_call = upload_calls[pdf_report_path]
     assert pdf_call.args[0] == pdf_report_path
     assert pdf_call.args[3] == "application/pdf"
-    uploaded_pdf_content = pdf_call.args[1].decode('utf-8')
+    uploaded_pdf_content = pdf_call.args[1].getvalue().decode('utf-8')
     assert f"Flood Simulation Report for Job ID: {job_id}" in uploaded_pdf_content
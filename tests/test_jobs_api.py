@@ -0,0 +1,136 @@
+import base64
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.core.database import Base, get_db
+from app.dependencies import get_api_key
+from app.models.api_key import APIKey # noqa: registers the table
+from app.models.job import Job, JobStatus, SolverType
+from app.models.performance_log import PerformanceLog # noqa: registers the table
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "jobs.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return path
+
+@pytest.fixture
+def add_jobs(db_path):
+    """Inserts jobs with the given (id, created_at) pairs; created_at None keeps the server default."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Session = sessionmaker(bind=engine)
+    def add(*jobs):
+        with Session() as db:
+            for job_id, created_at in jobs:
+                values = {"created_at": created_at} if created_at is not None else {}
+                db.add(Job(id=job_id, status=JobStatus.PENDING, solver_type=SolverType.CLASSICAL, **values))
+            db.commit()
+    yield add
+    engine.dispose()
+
+@pytest.fixture
+def client(db_path):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_api_key] = lambda: APIKey(id="test-key", hashed_key="x", is_active=True)
+    yield TestClient(app) # Not used as a context manager, so the lifespan (init_db) does not run
+    app.dependency_overrides.clear()
+
+def _page_through(client, limit):
+    """Follows X-Next-Cursor from the first page; returns the job IDs per page and the last response."""
+    pages = []
+    response = client.get(f"/api/v1/jobs?limit={limit}")
+    while True:
+        assert response.status_code == 200
+        pages.append([job["id"] for job in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages, response
+        response = client.get("/api/v1/jobs", params={"cursor": cursor, "limit": limit})
+
+def test_cursor_pages_through_equal_timestamps_without_duplicates(client, add_jobs):
+    shared = datetime(2025, 1, 1, 12, 0, 0)
+    add_jobs(
+        *[(f"job-{i}", shared) for i in range(5)], # Only the id orders these
+        ("job-newest", shared + timedelta(minutes=1)),
+        ("job-oldest", shared - timedelta(minutes=1)),
+    )
+
+    pages, _ = _page_through(client, limit=2)
+
+    ids = [job_id for page in pages for job_id in page]
+    assert len(ids) == len(set(ids)) == 7
+    assert ids == ["job-newest", "job-4", "job-3", "job-2", "job-1", "job-0", "job-oldest"]
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+def test_cursor_pages_through_server_default_timestamps(client, add_jobs):
+    # Jobs created by the API get their timestamp from the database, in a single second here
+    add_jobs(*[(f"job-{i}", None) for i in range(5)])
+
+    pages, _ = _page_through(client, limit=2)
+
+    ids = [job_id for page in pages for job_id in page]
+    assert sorted(ids) == [f"job-{i}" for i in range(5)]
+    assert len(ids) == len(set(ids))
+
+def test_cursor_pages_through_sub_second_timestamps(client, add_jobs):
+    # The later job has the smaller id: the cursor must compare full timestamps, not whole seconds
+    add_jobs(
+        ("job-a", datetime(2025, 1, 1, 12, 0, 0, 500000)),
+        ("job-z", datetime(2025, 1, 1, 12, 0, 0, 200000)),
+        ("job-m", datetime(2025, 1, 1, 12, 0, 0)),
+    )
+
+    pages, _ = _page_through(client, limit=1)
+
+    assert pages == [["job-a"], ["job-z"], ["job-m"]]
+
+def test_last_page_has_no_cursor(client, add_jobs):
+    add_jobs(*[(f"job-{i}", datetime(2025, 1, 1, 12, 0, i)) for i in range(3)])
+
+    # A page that exactly fills the limit is still the last one
+    response = client.get("/api/v1/jobs?limit=3")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert "X-Next-Cursor" not in response.headers
+    assert "Link" not in response.headers
+
+    response = client.get("/api/v1/jobs?limit=2")
+    assert "X-Next-Cursor" in response.headers
+    assert response.headers["Link"].endswith('>; rel="next"')
+    assert "cursor=" in response.headers["Link"]
+
+    pages, last_response = _page_through(client, limit=2)
+    assert pages == [["job-2", "job-1"], ["job-0"]]
+    assert "X-Next-Cursor" not in last_response.headers
+    assert "Link" not in last_response.headers
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    _b64(b"not json"),
+    _b64(b'{"created_at": "2025-01-01T12:00:00", "id": "job-0"}'), # Not a [created_at, id] pair
+    _b64(b'["2025-01-01T12:00:00"]'),
+    _b64(b'["not a timestamp", "job-0"]'),
+    "é",
+])
+def test_malformed_cursor_is_rejected(client, add_jobs, cursor):
+    add_jobs(("job-0", datetime(2025, 1, 1, 12, 0, 0)))
+
+    response = client.get("/api/v1/jobs", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor."
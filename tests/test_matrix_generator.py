@@ -33,6 +33,13 @@ def test_generate_laplacian_matrix_3x3():
     assert A[4, 1] == -1
     assert A[4, 7] == -1
 
+def test_generate_laplacian_matrix_1x1():
+    A = MatrixGeneratorService._generate_laplacian_matrix(1) # A staticmethod: no service (or MinIO client) needed
+    assert issparse(A)
+    assert A.shape == (1, 1)
+    assert A.nnz == 1
+    assert A[0, 0] == 4
+
 def test_read_preprocessed_data_for_grid_resolution_json(mock_minio_client):
     service = MatrixGeneratorService()
     job_id = "test_job_id"
@@ -71,7 +78,7 @@ def test_generate_matrix_with_preprocessed_data_priority(mock_minio_client):
 
     matrix_path, vector_path = service.generate_matrix(preprocessed_data_path, job_id, parameters)
 
-    assert matrix_path.startswith(f"jobs/{job_id}/matrix_A_")
+    assert matrix_path.startswith("shared/laplacian/")
     assert vector_path.startswith(f"jobs/{job_id}/vector_b_")
 
     # Verify upload calls
@@ -92,7 +99,7 @@ def test_generate_matrix_without_preprocessed_data(mock_minio_client):
 
     matrix_path, vector_path = service.generate_matrix(preprocessed_data_path, job_id, parameters)
 
-    assert matrix_path.startswith(f"jobs/{job_id}/matrix_A_")
+    assert matrix_path.startswith("shared/laplacian/")
     assert vector_path.startswith(f"jobs/{job_id}/vector_b_")
 
     # Verify upload calls
@@ -133,3 +140,19 @@ def test_generate_matrix_preprocessed_data_invalid_fallback_to_parameters(mock_m
     uploaded_matrix_data = mock_minio_client.upload_file.call_args_list[0].args[1].getvalue()
     A = load_npz(io.BytesIO(uploaded_matrix_data))
     assert A.shape == (225, 225) # 15*15
+
+def test_generate_matrix_reuses_stored_matrix(mock_minio_client):
+    service = MatrixGeneratorService()
+    parameters = {"grid_resolution": 6}
+
+    mock_minio_client.upload_file.return_value = None
+    first_matrix_path, _ = service.generate_matrix(None, "test_job_id_5", parameters)
+
+    # An identical matrix is already in the bucket: only vector b is uploaded for the second job
+    mock_minio_client.file_exists.return_value = True
+    mock_minio_client.upload_file.reset_mock()
+    second_matrix_path, second_vector_path = service.generate_matrix(None, "test_job_id_6", parameters)
+
+    assert second_matrix_path == first_matrix_path
+    assert mock_minio_client.upload_file.call_count == 1
+    assert mock_minio_client.upload_file.call_args.args[0] == second_vector_path
@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+import io
+from numpy.lib import format as npy_format
+from app.core.npy import BufferReader, NpyStream, load_npy
+
+def _npy_bytes(array, version=None) -> bytes:
+    bio = io.BytesIO()
+    npy_format.write_array(bio, array, version=version)
+    return bio.getvalue()
+
+ARRAYS = [
+    np.linspace(0, 1, 7, dtype=np.float64),
+    np.linspace(0, 1, 7, dtype=np.float32),
+    np.arange(12, dtype=np.float64).reshape(3, 4),
+    np.array(2.5), # 0-d
+    np.empty(0, dtype=np.float64),
+    np.empty((0, 3), dtype=np.float32),
+    np.array([1 + 2j, 3 - 4j]),
+]
+
+@pytest.mark.parametrize("array", ARRAYS, ids=lambda a: f"{a.dtype}-{a.shape}")
+def test_load_npy_round_trip(array):
+    loaded = load_npy(_npy_bytes(array))
+    assert loaded.dtype == array.dtype
+    assert loaded.shape == array.shape
+    assert np.array_equal(loaded, array)
+
+def test_load_npy_is_a_view_over_the_buffer():
+    data = bytearray(_npy_bytes(np.arange(4, dtype=np.float64)))
+    loaded = load_npy(data)
+    assert np.shares_memory(loaded, np.frombuffer(data, dtype=np.uint8))
+    assert loaded.flags.writeable # Writable when the buffer is
+
+def test_load_npy_of_bytes_is_read_only():
+    loaded = load_npy(_npy_bytes(np.arange(4, dtype=np.float64)))
+    assert not loaded.flags.writeable
+
+def test_load_npy_accepts_memoryview():
+    array = np.arange(5, dtype=np.float32)
+    assert np.array_equal(load_npy(memoryview(_npy_bytes(array))), array)
+
+def test_load_npy_format_version_2():
+    array = np.arange(6, dtype=np.float64).reshape(2, 3)
+    data = _npy_bytes(array, version=(2, 0))
+    assert data[6:8] == b"\x02\x00"
+    assert np.array_equal(load_npy(data), array)
+
+def test_load_npy_fortran_order_falls_back_to_np_load():
+    array = np.asfortranarray(np.arange(12, dtype=np.float64).reshape(3, 4))
+    loaded = load_npy(_npy_bytes(array))
+    assert np.array_equal(loaded, array)
+    assert loaded.shape == (3, 4)
+
+def test_load_npy_rejects_object_arrays():
+    data = _npy_bytes(np.array([{"a": 1}], dtype=object))
+    with pytest.raises(ValueError): # np.load without allow_pickle
+        load_npy(data)
+
+def _read_all(stream, chunk_size: int) -> bytes:
+    """Reads a stream through readinto calls of at most chunk_size bytes."""
+    out = bytearray()
+    buffer = bytearray(chunk_size)
+    while True:
+        read = stream.readinto(buffer)
+        if not read:
+            return bytes(out)
+        out += buffer[:read]
+
+@pytest.mark.parametrize("array", ARRAYS, ids=lambda a: f"{a.dtype}-{a.shape}")
+def test_npy_stream_matches_np_save(array):
+    with NpyStream(array) as stream:
+        data = stream.read()
+        assert stream.size == len(data)
+    assert data == _npy_bytes(array)
+    assert np.array_equal(load_npy(data), array)
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_npy_stream_short_reads(chunk_size):
+    # Chunk sizes that split the header, straddle the header/data boundary, and read everything at once
+    array = np.linspace(0, 1, 100, dtype=np.float64)
+    stream = NpyStream(array)
+    data = _read_all(stream, chunk_size)
+    assert len(data) == stream.size
+    assert data == _npy_bytes(array)
+    assert stream.readinto(bytearray(8)) == 0 # Exhausted
+
+def test_npy_stream_non_contiguous_array():
+    array = np.arange(20, dtype=np.float32).reshape(4, 5)[:, ::2]
+    data = NpyStream(array).read()
+    assert np.array_equal(load_npy(data), array)
+
+def test_npy_stream_fortran_array_is_written_in_c_order():
+    array = np.asfortranarray(np.arange(12, dtype=np.float64).reshape(3, 4))
+    data = NpyStream(array).read()
+    assert data == _npy_bytes(np.ascontiguousarray(array))
+    assert np.array_equal(load_npy(data), array)
+
+def test_buffer_reader_short_reads_and_seeks():
+    payload = bytes(range(256)) * 4
+    reader = BufferReader(memoryview(payload))
+    assert _read_all(reader, 100) == payload
+    assert reader.tell() == len(payload)
+    assert reader.seek(-10, io.SEEK_END) == len(payload) - 10
+    assert reader.read() == payload[-10:]
+    reader.seek(5)
+    reader.seek(3, io.SEEK_CUR)
+    assert reader.read(4) == payload[8:12]
+    with pytest.raises(ValueError):
+        reader.seek(-1)
+
+def test_buffer_reader_loads_npz():
+    from scipy.sparse import csc_matrix, load_npz, save_npz
+    matrix = csc_matrix(np.array([[4.0, -1.0], [-1.0, 4.0]], dtype=np.float32))
+    bio = io.BytesIO()
+    save_npz(bio, matrix)
+    loaded = load_npz(BufferReader(bytearray(bio.getvalue())))
+    assert loaded.dtype == np.float32
+    assert np.array_equal(loaded.toarray(), matrix.toarray())
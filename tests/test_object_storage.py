@@ -0,0 +1,124 @@
+import io
+import pytest
+import zstandard
+from app.core.config import settings
+from app.core.object_storage import MinioClient, STREAM_PART_SIZE
+
+class FakeResponse(io.BytesIO):
+    """Stands in for the urllib3 response returned by Minio.get_object."""
+    def __init__(self, body: bytes, headers: dict):
+        super().__init__(body)
+        self.headers = headers
+        self.released = False
+
+    def release_conn(self):
+        self.released = True
+
+def _zstd_response(payload: bytes, uncompressed_size: int | None = None) -> FakeResponse:
+    body = zstandard.ZstdCompressor(level=3).compress(payload)
+    return FakeResponse(body, {
+        "Content-Length": str(len(body)),
+        "x-amz-meta-encoding": "zstd",
+        "x-amz-meta-uncompressed-size": str(len(payload) if uncompressed_size is None else uncompressed_size),
+    })
+
+@pytest.fixture
+def minio(mocker):
+    """A MinioClient whose underlying Minio SDK client is a mock."""
+    sdk = mocker.patch("app.core.object_storage.Minio").return_value
+    sdk.bucket_exists.return_value = True
+    return MinioClient(), sdk
+
+PAYLOAD = bytes(range(256)) * 4096 + b"tail" # 1 MiB of compressible data with an odd length
+
+def test_zstd_upload_sends_compressed_stream_with_metadata(minio):
+    client, sdk = minio
+    uploaded = {}
+    def put_object(bucket, object_name, data, length, **kwargs):
+        uploaded.update(body=data.read(), length=length, **kwargs)
+    sdk.put_object.side_effect = put_object
+
+    client.upload_file("matrix.npy", io.BytesIO(PAYLOAD), len(PAYLOAD), "application/octet-stream", compress="zstd")
+
+    assert uploaded["length"] == -1 # Compressed size is unknown up front
+    assert uploaded["part_size"] == STREAM_PART_SIZE
+    assert uploaded["metadata"] == {"encoding": "zstd", "uncompressed-size": str(len(PAYLOAD))}
+    assert len(uploaded["body"]) < len(PAYLOAD)
+    assert zstandard.ZstdDecompressor().decompress(uploaded["body"]) == PAYLOAD
+
+def test_uncompressed_upload_passes_stream_through(minio):
+    client, sdk = minio
+    stream = io.BytesIO(PAYLOAD)
+
+    client.upload_file("matrix.npy", stream, len(PAYLOAD), "application/octet-stream")
+
+    args, kwargs = sdk.put_object.call_args
+    assert args == (settings.MINIO_BUCKET_NAME, "matrix.npy", stream, len(PAYLOAD))
+    assert "metadata" not in kwargs
+
+@pytest.mark.parametrize("file_size, compress", [(None, "zstd"), (10, "gzip")])
+def test_invalid_compressed_upload_is_rejected(minio, file_size, compress):
+    client, sdk = minio
+    with pytest.raises(ValueError):
+        client.upload_file("matrix.npy", io.BytesIO(b"0123456789"), file_size, "application/octet-stream", compress=compress)
+    sdk.put_object.assert_not_called()
+
+@pytest.mark.parametrize("payload", [PAYLOAD, b""], ids=["data", "empty"])
+def test_download_buffer_decompresses_zstd_to_uncompressed_size(minio, payload):
+    client, sdk = minio
+    response = _zstd_response(payload)
+    sdk.get_object.return_value = response
+
+    buffer = client.download_buffer("matrix.npy")
+
+    assert isinstance(buffer, memoryview)
+    assert buffer.nbytes == len(payload)
+    assert bytes(buffer) == payload
+    assert response.closed and response.released
+
+def test_download_file_decompresses_zstd(minio):
+    client, sdk = minio
+    sdk.get_object.return_value = _zstd_response(PAYLOAD)
+
+    assert client.download_file("matrix.npy") == PAYLOAD
+
+def test_zstd_object_shorter_than_its_uncompressed_size_raises(minio):
+    client, sdk = minio
+    response = _zstd_response(PAYLOAD, uncompressed_size=len(PAYLOAD) + 1)
+    sdk.get_object.return_value = response
+
+    with pytest.raises(IOError, match="ended after"):
+        client.download_buffer("matrix.npy")
+    assert response.closed and response.released
+
+def test_truncated_zstd_object_raises(minio):
+    client, sdk = minio
+    response = _zstd_response(PAYLOAD)
+    body = response.getvalue()
+    sdk.get_object.return_value = FakeResponse(body[:len(body) // 2], response.headers)
+
+    with pytest.raises(IOError, match="ended after"):
+        client.download_buffer("matrix.npy")
+
+def test_download_buffer_reads_plain_object_by_content_length(minio):
+    client, sdk = minio
+    sdk.get_object.return_value = FakeResponse(PAYLOAD, {"Content-Length": str(len(PAYLOAD))})
+
+    buffer = client.download_buffer("matrix.npy")
+
+    assert buffer.nbytes == len(PAYLOAD)
+    assert bytes(buffer) == PAYLOAD
+
+def test_download_buffer_raises_on_short_plain_object(minio):
+    client, sdk = minio
+    sdk.get_object.return_value = FakeResponse(PAYLOAD[:-1], {"Content-Length": str(len(PAYLOAD))})
+
+    with pytest.raises(IOError):
+        client.download_buffer("matrix.npy")
+
+def test_read_into_buffer_reassembles_short_reads():
+    class ShortReader(io.BytesIO):
+        def readinto(self, buffer):
+            return super().readinto(buffer[:7]) # At most 7 bytes per call
+    buffer = MinioClient._read_into_buffer(ShortReader(PAYLOAD), len(PAYLOAD), "matrix.npy")
+    assert bytes(buffer) == PAYLOAD